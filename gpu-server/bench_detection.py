@@ -0,0 +1,94 @@
+# bench_detection.py
+
+import argparse
+import glob
+import os
+import time
+import cv2
+import torch
+import torchvision
+from inference.detector import load_detector, native_input_size, DEFAULT_DETECTOR
+from inference.image_utils import preprocess_image
+from inference.tiled_detection import tiled_detect
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+COCO_BIRD = 16
+SMALL_FRACTION = 0.002  # Boxes under 0.2% of the frame count as small birds
+
+def detect_full(detector, image_rgb, device, native=False):
+    tensor = preprocess_image(image_rgb).unsqueeze(0).to(device)
+    with torch.no_grad():
+        if native:
+            with native_input_size(detector, image_rgb.shape):
+                return detector(tensor)[0]
+        return detector(tensor)[0]
+
+def birds(outputs, conf):
+    keep = (outputs["scores"].cpu() >= conf) & (outputs["labels"].cpu() == COCO_BIRD)
+    return outputs["boxes"].cpu()[keep]
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full-frame, high-res and tiled detection on a folder of frames.")
+    parser.add_argument('--images', required=True, help="Folder of received frames")
+    parser.add_argument('--detector', default=DEFAULT_DETECTOR)
+    parser.add_argument('--conf', type=float, default=0.5)
+    parser.add_argument('--limit', type=int, default=0)
+    args = parser.parse_args()
+
+    paths = sorted(p for p in glob.glob(os.path.join(args.images, '*')) if p.lower().endswith(IMAGE_EXTENSIONS))
+    if args.limit:
+        paths = paths[:args.limit]
+    if not paths:
+        print(f"[Bench] No images in {args.images}")
+        return
+
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    detector = load_detector(device, args.detector)
+    modes = {
+        "full": lambda image: detect_full(detector, image, device),
+        "highres": lambda image: detect_full(detector, image, device, native=True),
+        "tiled": lambda image: tiled_detect(detector, image, device)[0],
+    }
+    stats = {mode: {"time": 0.0, "birds": 0, "small": 0, "missed": 0} for mode in modes}
+
+    for i, path in enumerate(paths):
+        image_bgr = cv2.imread(path)
+        if image_bgr is None:
+            continue
+        image_rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
+        frame_area = image_rgb.shape[0] * image_rgb.shape[1]
+        if i == 0:
+            modes["full"](image_rgb)  # Warm-up, excluded from timing
+
+        found = {}
+        for mode, run in modes.items():
+            if device.type == "cuda":
+                torch.cuda.synchronize()
+            start = time.perf_counter()
+            outputs = run(image_rgb)
+            if device.type == "cuda":
+                torch.cuda.synchronize()
+            stats[mode]["time"] += time.perf_counter() - start
+            found[mode] = birds(outputs, args.conf)
+
+        # Full-frame native resolution is the reference; count its small birds each mode misses
+        reference = found["highres"]
+        small = reference[torchvision.ops.box_area(reference) < SMALL_FRACTION * frame_area]
+        for mode, boxes in found.items():
+            stats[mode]["birds"] += len(boxes)
+            stats[mode]["small"] += int((torchvision.ops.box_area(boxes) < SMALL_FRACTION * frame_area).sum())
+            if len(small):
+                if len(boxes):
+                    matched = torchvision.ops.box_iou(small, boxes).max(dim=1).values >= 0.5
+                    stats[mode]["missed"] += int((~matched).sum())
+                else:
+                    stats[mode]["missed"] += len(small)
+
+    n = len(paths)
+    print(f"[Bench] {n} images, detector {args.detector}, conf {args.conf}")
+    print(f"[Bench] {'mode':<8} {'ms/image':>9} {'birds':>6} {'small':>6} {'small missed vs highres':>24}")
+    for mode, s in stats.items():
+        print(f"[Bench] {mode:<8} {1000 * s['time'] / n:>9.1f} {s['birds']:>6} {s['small']:>6} {s['missed']:>24}")
+
+if __name__ == "__main__":
+    main()
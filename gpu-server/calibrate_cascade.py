@@ -0,0 +1,101 @@
+# calibrate_cascade.py
+
+import argparse
+import os
+import time
+import torch
+from PIL import Image
+from inference.classifier import BirdClassifier, DEFAULT_CLASSIFIER
+from inference.cascade import normalize_label
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+def labelled_images(folder):
+    """Yields (path, label) for every image in `folder/<label>/`."""
+    for label in sorted(os.listdir(folder)):
+        label_dir = os.path.join(folder, label)
+        if not os.path.isdir(label_dir):
+            continue
+        for name in sorted(os.listdir(label_dir)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(label_dir, name), normalize_label(label)
+
+def timed_predict(classifier, image):
+    start = time.perf_counter()
+    species, confidence = classifier.predict(image)
+    return normalize_label(species), confidence, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Pick the cascade threshold on a labelled folder of bird crops.")
+    parser.add_argument('--data', required=True, help="Folder with one subfolder of crops per species label")
+    parser.add_argument('--fast', required=True, help="Fast classifier model name")
+    parser.add_argument('--full', default=DEFAULT_CLASSIFIER, help="Full classifier model name")
+    parser.add_argument('--tolerance', type=float, default=0.01, help="Allowed accuracy drop vs the full classifier alone")
+    parser.add_argument('--limit', type=int, default=0, help="Use at most this many images")
+    args = parser.parse_args()
+
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    fast = BirdClassifier(model_name=args.fast, device=device)
+    full = BirdClassifier(model_name=args.full, device=device)
+
+    # Both stages run on every image once; each threshold is then scored from these results
+    samples = []
+    for path, label in labelled_images(args.data):
+        if args.limit and len(samples) >= args.limit:
+            break
+        image = Image.open(path).convert("RGB")
+        if not samples:
+            fast.predict(image)  # Warm-up, excluded from timing
+            full.predict(image)
+        fast_species, fast_conf, fast_time = timed_predict(fast, image)
+        full_species, _, full_time = timed_predict(full, image)
+        samples.append({
+            "fast_correct": fast_species == label,
+            "fast_conf": fast_conf,
+            "fast_time": fast_time,
+            "full_correct": full_species == label,
+            "full_time": full_time,
+        })
+
+    if not samples:
+        print(f"[Calibrate] No labelled images found in {args.data}")
+        return
+
+    n = len(samples)
+    full_accuracy = sum(s["full_correct"] for s in samples) / n
+    full_time = sum(s["full_time"] for s in samples) / n
+    print(f"[Calibrate] {n} images, full classifier accuracy {full_accuracy:.3f}, {1000 * full_time:.1f} ms/crop")
+    print(f"[Calibrate] {'threshold':>9} {'accuracy':>9} {'fast share':>11} {'ms/crop':>8} {'speedup':>8}")
+
+    best = None
+    for threshold in [t / 100 for t in range(50, 100, 5)] + [0.97, 0.99]:
+        correct = 0
+        total_time = 0.0
+        accepted = 0
+        for s in samples:
+            total_time += s["fast_time"]
+            if s["fast_conf"] >= threshold:
+                accepted += 1
+                correct += s["fast_correct"]
+            else:
+                total_time += s["full_time"]
+                correct += s["full_correct"]
+        accuracy = correct / n
+        cascade_time = total_time / n
+        speedup = full_time / cascade_time if cascade_time else 0.0
+        print(f"[Calibrate] {threshold:>9.2f} {accuracy:>9.3f} {accepted / n:>11.1%} "
+              f"{1000 * cascade_time:>8.1f} {speedup:>7.2f}x")
+        # Thresholds ascend, so the first one within tolerance sends the most crops to the fast stage
+        if best is None and accuracy >= full_accuracy - args.tolerance:
+            best = (threshold, accuracy, speedup)
+
+    if best is None:
+        print(f"[Calibrate] No threshold keeps accuracy within {args.tolerance} of the full classifier; "
+              f"leave FAST_CLASSIFIER_MODEL unset.")
+        return
+    threshold, accuracy, speedup = best
+    print(f"[Calibrate] Recommended CASCADE_THRESHOLD={threshold:.2f} "
+          f"(accuracy {accuracy:.3f} vs {full_accuracy:.3f}, average speedup {speedup:.2f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# chunk_assembler.py
+
+import time
+import threading
+
+
+class ChunkAssembler:
+    """
+    Reassembles images the Pi splits into sequenced MQTT chunks.
+
+    Partial transfers are dropped after `timeout` seconds, and the total size of
+    buffered chunks is capped at `max_bytes` (oldest transfers are evicted first)
+    so a lost or malicious sender cannot exhaust server memory.
+    """
+
+    def __init__(self, timeout: float = 60.0, max_bytes: int = 64 * 1024 * 1024,
+                 max_transfer_bytes: int = 32 * 1024 * 1024):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.max_transfer_bytes = max_transfer_bytes
+        self.transfers = {}
+        self.buffered = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def _discard(self, transfer_id: str, reason: str) -> None:
+        transfer = self.transfers.pop(transfer_id, None)
+        if transfer is None:
+            return
+        self.buffered -= transfer["bytes"]
+        self.dropped += 1
+        print(f"[Chunks] Dropped transfer {transfer_id[:8]} ({reason}, "
+              f"{len(transfer['parts'])}/{transfer['count']} chunks received)")
+
+    def expire(self) -> None:
+        """Drop partial transfers that have not completed within the timeout."""
+        now = time.monotonic()
+        with self._lock:
+            for transfer_id in [t for t, v in self.transfers.items() if now - v["started"] > self.timeout]:
+                self._discard(transfer_id, "timed out")
+
+    def add(self, header: dict, data: bytes):
+        """
+        Add one chunk. Returns the full payload once every chunk has arrived, else None.
+        """
+        transfer_id = header["transfer_id"]
+        index, count, total_size = header["index"], header["count"], header["total_size"]
+
+        if total_size > self.max_transfer_bytes:
+            print(f"[Chunks] Rejected transfer {transfer_id[:8]}: {total_size} bytes exceeds limit")
+            return None
+
+        self.expire()
+        with self._lock:
+            transfer = self.transfers.get(transfer_id)
+            if transfer is None:
+                transfer = {"count": count, "total_size": total_size, "parts": {},
+                            "bytes": 0, "started": time.monotonic()}
+                self.transfers[transfer_id] = transfer
+
+            if index in transfer["parts"] or not 0 <= index < count:
+                return None  # Duplicate (QoS 1 redelivery) or malformed
+            transfer["parts"][index] = data
+            transfer["bytes"] += len(data)
+            self.buffered += len(data)
+
+            # Evict the oldest other transfers until we are back under the memory cap
+            while self.buffered > self.max_bytes and len(self.transfers) > 1:
+                oldest = min((t for t in self.transfers if t != transfer_id),
+                             key=lambda t: self.transfers[t]["started"])
+                self._discard(oldest, "memory limit")
+            if self.buffered > self.max_bytes:
+                self._discard(transfer_id, "memory limit")
+                return None
+
+            if len(transfer["parts"]) < count:
+                return None
+
+            self.transfers.pop(transfer_id)
+            self.buffered -= transfer["bytes"]
+
+        payload = b"".join(transfer["parts"][i] for i in range(count))
+        if len(payload) != total_size:
+            print(f"[Chunks] Transfer {transfer_id[:8]} size mismatch ({len(payload)} != {total_size})")
+            return None
+        return payload
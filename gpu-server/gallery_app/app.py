@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, url_for
+from flask import Flask, jsonify, render_template, request, url_for
 import json
 import os
 
@@ -8,6 +8,31 @@ STATIC_PATH = os.path.join(BASE_DIR, '..', 'static')
 
 app = Flask(__name__, static_folder=STATIC_PATH, template_folder='templates')
 
+_embedding_store = None
+
+def get_embedding_store():
+    """
+    Read-only view of the crop embeddings written by predict(), or None if EMBEDDING_DIR is empty.
+    Imported lazily, and after .env is loaded, so the gallery does not depend on the inference package.
+    """
+    global _embedding_store
+    if _embedding_store is None:
+        from dotenv import load_dotenv
+        from inference.embedding_index import EmbeddingStore
+        load_dotenv()
+        embedding_dir = os.getenv('EMBEDDING_DIR', 'embeddings')
+        if not embedding_dir:
+            return None
+        _embedding_store = EmbeddingStore(os.path.join(BASE_DIR, '..', embedding_dir), writable=False)
+    return _embedding_store
+
+def annotated_name(image_file):
+    """Gallery copy of a received image: `<name>_annotated.jpg` in static/."""
+    if image_file and not image_file.endswith('_annotated.jpg'):
+        name, ext = os.path.splitext(image_file)
+        return f"{name}_annotated{ext}"
+    return image_file
+
 def load_predictions(min_conf: float):
     """Load predictions from log file filtered by min confidence."""
     entries = []
@@ -24,21 +49,26 @@ def load_predictions(min_conf: float):
             except json.JSONDecodeError:
                 continue
 
-            detections = [d for d in data.get('detections', []) if d.get('confidence', 0) >= min_conf]
+            # Keep each detection's position in the log; it identifies the crop in the embedding index
+            detections = [dict(d, index=i) for i, d in enumerate(data.get('detections', []))
+                          if (d.get('confidence') or 0) >= min_conf]
             if not detections:
                 continue
 
-            image_file = data.get('image_file')
-            if image_file and not image_file.endswith('_annotated.jpg'):
-                name, ext = os.path.splitext(image_file)
-                image_file = f"{name}_annotated{ext}"
-
             entries.append({
                 'timestamp': data.get('timestamp'),
-                'image_file': image_file,
-                'detections': detections
+                'source_file': data.get('image_file'),
+                'image_file': annotated_name(data.get('image_file')),
+                'detections': detections,
+                'backfilled': data.get('degradation', {}).get('backfilled', False)
             })
 
+    # A detection-only entry logged under overload is replaced by its backfilled one
+    backfilled = {entry['source_file'] for entry in entries if entry['backfilled']}
+    entries = [entry for entry in entries
+               if entry['backfilled'] or entry['source_file'] not in backfilled
+               or any(d.get('species') for d in entry['detections'])]
+
     entries.sort(key=lambda x: x['timestamp'], reverse=True)
     return entries
 
@@ -48,6 +78,51 @@ def index():
     entries = load_predictions(min_conf)
     return render_template('index.html', entries=entries, min_conf=min_conf)
 
+@app.route('/similar')
+def similar():
+    """Sightings whose crop embedding is closest (cosine) to detection `det` of `image`."""
+    image = request.args.get('image', '')
+    det = request.args.get('det', default=0, type=int)
+    k = request.args.get('k', default=24, type=int)
+
+    store = get_embedding_store()
+    crop_index, row = store.find(image, det) if store is not None else (None, None)
+    if crop_index is None:
+        return render_template('similar.html', query=None, image=image, det=det, results=[]), 404
+
+    query = dict(crop_index.records[row], image_file=annotated_name(image))
+    results = [dict(record, score=score, source_file=record['image_file'],
+                    image_file=annotated_name(record['image_file']))
+               for score, record in crop_index.search(crop_index.vector(row), k=k, exclude_row=row)]
+    return render_template('similar.html', query=query, image=image, det=det, results=results)
+
+def get_registry():
+    """The inference model registry; imported lazily so the gallery can run without loading models."""
+    from inference.predict import registry
+    return registry
+
+@app.route('/models', methods=['GET'])
+def models_status():
+    return jsonify(get_registry().status())
+
+@app.route('/models/load', methods=['POST'])
+def models_load():
+    """
+    Loads and warms up a new detector and/or classifier in the background, then swaps it in.
+    Body: {"classifier": "<hf model name>", "detector": "<torchvision detection model>",
+           "fast_classifier": "<hf model name, or empty to disable the cascade>", "cascade_threshold": 0.8}
+    """
+    data = request.get_json(silent=True) or {}
+    keys = ('classifier', 'detector', 'fast_classifier', 'cascade_threshold')
+    if not any(key in data for key in keys):
+        return jsonify({"error": f"Give at least one of {', '.join(keys)}"}), 400
+    registry = get_registry()
+    if not registry.load(detector_name=data.get('detector'), classifier_name=data.get('classifier'),
+                         fast_classifier_name=data.get('fast_classifier'),
+                         cascade_threshold=data.get('cascade_threshold')):
+        return jsonify({"error": "A model load is already in progress", **registry.status()}), 409
+    return jsonify(registry.status()), 202
+
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=8080)
@@ -0,0 +1,66 @@
+# inference/batch.py
+
+import torch
+from PIL import Image
+from inference.image_utils import preprocess_image
+
+MIN_CROP_SIZE = 10
+
+def extract_crops(image_rgb, outputs, conf_threshold=0.5, scale=1.0):
+    """
+    Turns one image's detector output into crops worth classifying.
+    `scale` is the detector input size relative to image_rgb; boxes are mapped back to image_rgb.
+
+    Returns:
+        list: (box, score, label, crop) per detection above conf_threshold, skipping tiny crops.
+    """
+    crops = []
+    for box, score, label in zip(outputs["boxes"], outputs["scores"], outputs["labels"]):
+        if score.item() < conf_threshold:
+            continue
+
+        x1, y1, x2, y2 = (int(v / scale) for v in box.tolist())
+        crop = image_rgb[y1:y2, x1:x2]
+
+        if crop.shape[0] < MIN_CROP_SIZE or crop.shape[1] < MIN_CROP_SIZE:
+            print(f"Skipping tiny crop: {crop.shape}")
+            continue
+        crops.append(([x1, y1, x2, y2], score.item(), label.item(), crop))
+    return crops
+
+def predict_batch(models, images_rgb, device, conf_threshold=0.5):
+    """
+    Runs detection and classification over several images at once.
+
+    Parameters:
+        models (ModelSet): Snapshot from ModelRegistry.current().
+        images_rgb (list): RGB numpy images, sizes may differ.
+        device (torch.device): Device the models live on.
+
+    Returns:
+        list: One list of detection dicts per image, in the same format predict() logs.
+    """
+    if not images_rgb:
+        return []
+    tensors = [preprocess_image(image).to(device) for image in images_rgb]
+    with torch.no_grad():
+        outputs = models.detector(tensors)
+
+    # Classify every crop of the batch together
+    crops = []
+    for image_index, (image_rgb, output) in enumerate(zip(images_rgb, outputs)):
+        for box, score, label, crop in extract_crops(image_rgb, output, conf_threshold):
+            crops.append((image_index, box, score, label, Image.fromarray(crop)))
+    labels = models.cascade.classify_batch([crop[4] for crop in crops])
+
+    results = [[] for _ in images_rgb]
+    for (image_index, box, score, label, _), (species, confidence, stage) in zip(crops, labels):
+        results[image_index].append({
+            "box": box,
+            "score": round(score, 3),
+            "label": f"object_{label}",
+            "species": species,
+            "confidence": round(confidence, 3),
+            "stage": stage
+        })
+    return results
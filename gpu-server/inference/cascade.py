@@ -0,0 +1,105 @@
+# inference/cascade.py
+
+import re
+
+FAST_STAGE = "fast"
+FULL_STAGE = "full"
+
+def normalize_label(label: str) -> str:
+    """
+    Canonical form of a species label so models (and folder names) that spell CUB-200
+    classes differently still match, e.g. "001.Black_footed_Albatross" -> "black footed albatross".
+    """
+    label = re.sub(r"^\d+\.", "", str(label))
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", label.lower()).split())
+
+
+class CascadeClassifier:
+    """
+    Two-stage species classifier.
+
+    A small fast model labels every crop first. Only crops where its confidence
+    is below `threshold` (or whose label the full model doesn't know) are passed
+    to the full classifier. Accepted fast answers use the full model's label names. Without a fast model
+    every crop goes straight to the full classifier.
+    """
+
+    def __init__(self, full, fast=None, threshold=0.8):
+        """
+        Parameters:
+            full (BirdClassifier): Accurate classifier used when the fast stage is unsure.
+            fast (BirdClassifier): Cheap classifier over the same labels, or None to disable the cascade.
+            threshold (float): Fast-stage confidence at or above which its answer is accepted.
+        """
+        self.full = full
+        self.fast = fast
+        self.threshold = threshold
+        self.counts = {FAST_STAGE: 0, FULL_STAGE: 0}
+
+        # Fast-stage answers are reported under the full classifier's spelling of the label,
+        # so one species is logged under one name whichever stage decided
+        self._fast_to_full = {}
+        if fast is not None:
+            full_labels = {normalize_label(l): l for l in full.id2label.values()}
+            self._fast_to_full = {l: full_labels.get(normalize_label(l)) for l in fast.id2label.values()}
+            missing = [l for l, mapped in self._fast_to_full.items() if mapped is None]
+            if missing:
+                print(f"[Cascade] Warning: {len(missing)} fast-stage labels are not known to the full classifier "
+                      f"and always go to the full stage, e.g. {missing[:3]}")
+
+    def _accept_fast(self, species, confidence):
+        """The full classifier's label for a fast-stage answer, or None if it must go to the full stage."""
+        if confidence < self.threshold:
+            return None
+        return self._fast_to_full.get(species)
+
+    def classify(self, pil_image, return_embedding=False):
+        """
+        Returns:
+            tuple: (species, confidence, stage) where stage is "fast" or "full".
+                   With return_embedding=True, the deciding model's embedding is appended;
+                   it lives in that model's feature space (see model_for()).
+        """
+        if self.fast is not None:
+            result = self.fast.predict(pil_image, return_embedding=return_embedding)
+            species = self._accept_fast(*result[:2])
+            if species is not None:
+                self.counts[FAST_STAGE] += 1
+                return (species, result[1], FAST_STAGE, *result[2:])
+
+        result = self.full.predict(pil_image, return_embedding=return_embedding)
+        self.counts[FULL_STAGE] += 1
+        return (*result[:2], FULL_STAGE, *result[2:])
+
+    def classify_batch(self, pil_images):
+        """
+        Batched classify(): the fast stage sees every crop, the full stage only the unsure ones.
+
+        Returns:
+            list: (species, confidence, stage) per image.
+        """
+        results = [None] * len(pil_images)
+        pending = list(range(len(pil_images)))
+        if self.fast is not None and pending:
+            for i, (species, confidence) in enumerate(self.fast.predict_batch(pil_images)):
+                species = self._accept_fast(species, confidence)
+                if species is not None:
+                    results[i] = (species, confidence, FAST_STAGE)
+            pending = [i for i in pending if results[i] is None]
+            self.counts[FAST_STAGE] += len(pil_images) - len(pending)
+
+        if pending:
+            full = self.full.predict_batch([pil_images[i] for i in pending])
+            for i, (species, confidence) in zip(pending, full):
+                results[i] = (species, confidence, FULL_STAGE)
+            self.counts[FULL_STAGE] += len(pending)
+        return results
+
+    def model_for(self, stage):
+        """The classifier that decides results for `stage`."""
+        return self.fast if stage == FAST_STAGE else self.full
+
+    def predict(self, pil_image):
+        """Same interface as BirdClassifier.predict: (species, confidence)."""
+        species, confidence, _ = self.classify(pil_image)
+        return species, confidence
@@ -3,8 +3,11 @@
 from transformers import AutoImageProcessor, AutoModelForImageClassification
 import torch
 
+DEFAULT_CLASSIFIER = "Emiel/cub-200-bird-classifier-swin"
+
 class BirdClassifier:
-    def __init__(self, model_name="Emiel/cub-200-bird-classifier-swin", device=None):
+    def __init__(self, model_name=DEFAULT_CLASSIFIER, device=None):
+        self.model_name = model_name
         self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
 
         # Load model and image processor
@@ -15,14 +18,44 @@ class BirdClassifier:
         # Map class index → bird species name
         self.id2label = self.model.config.id2label
 
-    def predict(self, pil_image):
+        # The pooled features feeding the classification head double as the crop embedding
+        self._pooled = None
+        head = getattr(self.model, "classifier", None)
+        if isinstance(head, torch.nn.Module):
+            head.register_forward_pre_hook(self._capture_pooled)
+
+    def _capture_pooled(self, module, inputs):
+        self._pooled = inputs[0]
+
+    def predict(self, pil_image, return_embedding=False):
+        """
+        Returns (species, confidence), or (species, confidence, embedding) with
+        return_embedding=True. The embedding is the pooled float32 feature vector, or None
+        if the model has no `classifier` head to read it from.
+        """
         inputs = self.processor(images=pil_image, return_tensors="pt").to(self.device)
 
+        self._pooled = None
         with torch.no_grad():
             outputs = self.model(**inputs)
             probs = torch.softmax(outputs.logits, dim=-1)
             conf, pred = torch.max(probs, dim=1)
 
         species = self.id2label.get(pred.item(), f"class_{pred.item()}")
-        return species, conf.item()
+        if not return_embedding:
+            return species, conf.item()
+        embedding = self._pooled[0].float().cpu().numpy() if self._pooled is not None else None
+        return species, conf.item(), embedding
+
+    def predict_batch(self, pil_images, batch_size=32):
+        """Classifies many crops in batches of batch_size. Returns [(species, confidence), ...]."""
+        results = []
+        for start in range(0, len(pil_images), batch_size):
+            inputs = self.processor(images=pil_images[start:start + batch_size], return_tensors="pt").to(self.device)
+            with torch.no_grad():
+                probs = torch.softmax(self.model(**inputs).logits, dim=-1)
+                confs, preds = torch.max(probs, dim=1)
+            for conf, pred in zip(confs.tolist(), preds.tolist()):
+                results.append((self.id2label.get(pred, f"class_{pred}"), conf))
+        return results
 
@@ -0,0 +1,109 @@
+# inference/degradation.py
+
+import threading
+import time
+
+# Each level keeps the savings of the levels before it
+LEVEL_NAMES = ["full", "downscale", "cap_crops", "no_annotation", "detect_only"]
+FULL, DOWNSCALE, CAP_CROPS, NO_ANNOTATION, DETECT_ONLY = range(len(LEVEL_NAMES))
+
+class DegradationController:
+    """
+    Trades result quality for throughput when inference falls behind a latency target.
+
+    After every frame the receiver reports its receive-to-logged latency and the
+    number of frames still queued. If the smoothed latency or the backlog exceeds
+    the target, the controller steps down one level:
+
+        full -> downscale detector input -> cap crops per frame
+             -> skip annotation rendering -> detection only (classify later)
+
+    Once latency stays well under the target with nothing queued, or the queue
+    has stayed empty for `hold` seconds (see idle()), it steps back up one level
+    at a time. Changes are at least `hold` seconds apart so each step has time
+    to show its effect.
+    """
+
+    def __init__(self, target_latency=5.0, max_backlog=10, smoothing=0.3, recover_ratio=0.5, hold=10.0,
+                 detector_max_side=640, max_crops=3):
+        """
+        Parameters:
+            target_latency (float): Seconds from receipt to logged result that the server aims to stay under.
+            max_backlog (int): Queued frames that trigger a step down regardless of latency.
+            smoothing (float): Weight of each new latency sample (0-1).
+            recover_ratio (float): Step up once smoothed latency is below target * recover_ratio.
+            hold (float): Minimum seconds between level changes.
+            detector_max_side (int): Longest image side fed to the detector from the "downscale" level on.
+            max_crops (int): Crops classified per frame from the "cap_crops" level on.
+        """
+        self.target_latency = target_latency
+        self.max_backlog = max_backlog
+        self.smoothing = smoothing
+        self.recover_ratio = recover_ratio
+        self.hold = hold
+        self.detector_max_side = detector_max_side
+        self.max_crops = max_crops
+
+        self.level = FULL
+        self.latency = None
+        self.backlog = 0
+        self._last_change = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, latency, backlog):
+        """Feeds one frame's latency (seconds) and the current queue length; may change the level."""
+        with self._lock:
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency += self.smoothing * (latency - self.latency)
+            self.backlog = backlog
+
+            now = time.monotonic()
+            if now - self._last_change < self.hold:
+                return
+            overloaded = self.latency > self.target_latency or backlog > self.max_backlog
+            relaxed = self.latency < self.target_latency * self.recover_ratio and backlog == 0
+            if overloaded and self.level < DETECT_ONLY:
+                self._set_level(self.level + 1, now)
+            elif relaxed and self.level > FULL:
+                self._set_level(self.level - 1, now)
+
+    def idle(self, since):
+        """
+        Reports that the queue has been empty since `since` (time.monotonic()). Steps up once it
+        has stayed empty for `hold` seconds; the latency average only ever sees real frames.
+        """
+        with self._lock:
+            self.backlog = 0
+            now = time.monotonic()
+            if self.level > FULL and now - since >= self.hold and now - self._last_change >= self.hold:
+                self._set_level(self.level - 1, now)
+
+    def _set_level(self, level, now):
+        direction = "down" if level > self.level else "up"
+        print(f"[Degradation] Stepping {direction} to '{LEVEL_NAMES[level]}' "
+              f"(latency {self.latency:.1f}s, target {self.target_latency}s, backlog {self.backlog})")
+        self.level = level
+        self._last_change = now
+
+    def settings(self):
+        """What predict() should do at the current level."""
+        return settings_for(self.level, self.detector_max_side, self.max_crops)
+
+    def status(self):
+        return {"level": self.level, "name": LEVEL_NAMES[self.level],
+                "latency": self.latency, "backlog": self.backlog}
+
+
+def settings_for(level, detector_max_side=640, max_crops=3):
+    return {
+        "level": level,
+        "name": LEVEL_NAMES[level],
+        "detector_max_side": detector_max_side if level >= DOWNSCALE else None,
+        "max_crops": max_crops if level >= CAP_CROPS else None,
+        "annotate": level < NO_ANNOTATION,
+        "classify": level < DETECT_ONLY,
+    }
+
+FULL_SETTINGS = settings_for(FULL)
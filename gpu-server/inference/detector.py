@@ -1,15 +1,37 @@
 import torchvision
 import torch
+from contextlib import contextmanager
 
-def load_detector(device=None):
+DEFAULT_DETECTOR = "fasterrcnn_resnet50_fpn"
+
+def load_detector(device=None, model_name=DEFAULT_DETECTOR):
     if device is None:
         device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
-    # Load pretrained Faster R-CNN model
-    model = torchvision.models.detection.fasterrcnn_resnet50_fpn(weights="DEFAULT")
+    # Load a pretrained torchvision detection model (Faster R-CNN by default)
+    builder = getattr(torchvision.models.detection, model_name, None)
+    if builder is None:
+        raise ValueError(f"Unknown torchvision detection model: {model_name}")
+    model = builder(weights="DEFAULT")
 
     model.to(device)
     model.eval()  # Set to inference mode (no training updates)
-    print("[Detector] Model loaded and ready.")
+    print(f"[Detector] {model_name} loaded and ready.")
     return model
 
+
+@contextmanager
+def native_input_size(detector, image_shape):
+    """
+    Runs a torchvision detector at the given image's own resolution. By default its
+    transform rescales every input to an 800 px short side, which would undo any
+    downscaling done to save time.
+    """
+    transform = detector.transform
+    saved = transform.min_size, transform.max_size
+    height, width = image_shape[:2]
+    transform.min_size, transform.max_size = (min(height, width),), max(height, width)
+    try:
+        yield
+    finally:
+        transform.min_size, transform.max_size = saved
@@ -0,0 +1,207 @@
+# inference/embedding_index.py
+
+import json
+import os
+import re
+import threading
+import numpy as np
+
+VECTORS_FILE = "vectors.f16"
+META_FILE = "meta.json"
+RECORDS_FILE = "records.jsonl"
+SEARCH_BLOCK_ROWS = 4096  # Rows converted to float32 at a time during search (16 MB at 1024 dims)
+
+class EmbeddingIndex:
+    """
+    Append-only matrix of L2-normalized crop embeddings for one classifier model.
+
+    Vectors live in a memory-mapped float16 file that doubles in capacity when
+    full, with one JSON record per row (image, detection index, species) in a
+    side file. Cosine similarity is a dot product over the mapped rows, done in
+    small float32 blocks through one reused buffer, followed by an argpartition
+    top-k. Search is a linear scan: each query reads the whole file. A read-only instance
+    (writable=False) picks up rows appended by the writer on each search.
+    """
+
+    def __init__(self, directory, writable=True, initial_capacity=4096):
+        self.directory = directory
+        self.writable = writable
+        self.initial_capacity = initial_capacity
+        self.dim = None
+        self.count = 0
+        self.capacity = 0
+        self.records = []
+        self._rows_by_crop = {}
+        self._records_offset = 0
+        self._vectors = None
+        self._lock = threading.RLock()
+        if writable:
+            os.makedirs(directory, exist_ok=True)
+        self.refresh()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _open_vectors(self):
+        self._vectors = np.memmap(self._path(VECTORS_FILE), dtype=np.float16,
+                                  mode="r+" if self.writable else "r", shape=(self.capacity, self.dim))
+
+    def _resize_file(self, capacity):
+        with open(self._path(VECTORS_FILE), "ab") as f:
+            f.truncate(capacity * self.dim * np.dtype(np.float16).itemsize)
+        self.capacity = capacity
+        self._open_vectors()
+
+    def _write_meta(self):
+        # Written after the vector and record, so readers never see a row that isn't there yet
+        tmp_path = self._path(META_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"dim": self.dim, "count": self.count, "capacity": self.capacity}, f)
+        os.replace(tmp_path, self._path(META_FILE))
+
+    def refresh(self):
+        """Loads rows appended since the last call (by this or another process)."""
+        with self._lock:
+            try:
+                with open(self._path(META_FILE)) as f:
+                    meta = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                return
+            if meta["capacity"] != self.capacity or self._vectors is None:
+                self.dim, self.capacity = meta["dim"], meta["capacity"]
+                self._open_vectors()
+
+            with open(self._path(RECORDS_FILE)) as f:
+                f.seek(self._records_offset)
+                while len(self.records) < meta["count"]:
+                    line = f.readline()
+                    if not line.endswith("\n"):
+                        break  # Partially written record; pick it up next time
+                    self._add_record(json.loads(line))
+                self._records_offset = f.tell()
+            if self.writable:
+                # Drop a record left behind by a crash between writing it and updating meta
+                with open(self._path(RECORDS_FILE), "r+") as f:
+                    f.truncate(self._records_offset)
+            self.count = len(self.records)
+
+    def _add_record(self, record):
+        self.records.append(record)
+        self._rows_by_crop[(record.get("image_file"), record.get("det"))] = record["row"]
+
+    def add(self, vector, record) -> int:
+        """
+        Appends one embedding with its record and returns its row.
+        """
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            raise ValueError("Cannot index a zero embedding")
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = vector.size
+                self._resize_file(self.initial_capacity)
+            elif vector.size != self.dim:
+                raise ValueError(f"Embedding has {vector.size} dims, index has {self.dim}")
+            if self.count >= self.capacity:
+                self._vectors.flush()
+                self._resize_file(self.capacity * 2)
+
+            row = self.count
+            self._vectors[row] = vector / norm
+            record = dict(record, row=row)
+            with open(self._path(RECORDS_FILE), "a") as f:
+                f.write(json.dumps(record) + "\n")
+                self._records_offset = f.tell()
+            self._add_record(record)
+            self.count += 1
+            self._write_meta()
+            return row
+
+    def flush(self):
+        with self._lock:
+            if self._vectors is not None and self.writable:
+                self._vectors.flush()
+
+    def find(self, image_file, det):
+        """Row of detection `det` in `image_file`, or None."""
+        return self._rows_by_crop.get((image_file, det))
+
+    def vector(self, row):
+        return np.asarray(self._vectors[row], dtype=np.float32)
+
+    def search(self, query, k=20, exclude_row=None):
+        """
+        Returns the k rows most similar to `query` as [(score, record), ...], best first.
+        """
+        if not self.writable:
+            self.refresh()
+        with self._lock:
+            vectors, count = self._vectors, self.count
+        if count == 0:
+            return []
+
+        query = np.asarray(query, dtype=np.float32).ravel()
+        query /= np.linalg.norm(query) or 1.0
+        scores = np.empty(count, dtype=np.float32)
+        # numpy has no fast float16 matmul; convert block by block into one buffer instead of per-block copies
+        block = np.empty((min(SEARCH_BLOCK_ROWS, count), vectors.shape[1]), dtype=np.float32)
+        for start in range(0, count, SEARCH_BLOCK_ROWS):
+            end = min(start + SEARCH_BLOCK_ROWS, count)
+            rows = block[:end - start]
+            np.copyto(rows, vectors[start:end])
+            np.dot(rows, query, out=scores[start:end])
+        if exclude_row is not None and exclude_row < count:
+            scores[exclude_row] = -np.inf
+
+        k = min(k, count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[row]), self.records[row]) for row in top if np.isfinite(scores[row])]
+
+
+class EmbeddingStore:
+    """
+    One EmbeddingIndex per classifier model under `root`, since embeddings from
+    different models (cascade stages, hot-swapped versions) are not comparable.
+    """
+
+    def __init__(self, root="embeddings", writable=True):
+        self.root = root
+        self.writable = writable
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _slug(model_name):
+        return re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+
+    def index(self, model_name):
+        slug = self._slug(model_name)
+        with self._lock:
+            index = self._indexes.get(slug)
+            if index is None:
+                index = EmbeddingIndex(os.path.join(self.root, slug), writable=self.writable)
+                self._indexes[slug] = index
+            return index
+
+    def add(self, model_name, vector, record):
+        return self.index(model_name).add(vector, record)
+
+    def models(self):
+        """Names of the models with an index on disk (slugged directory names)."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self.root, name, META_FILE)))
+
+    def find(self, image_file, det):
+        """Returns (index, row) for a detection, searching every model's index, or (None, None)."""
+        for model_name in self.models():
+            index = self.index(model_name)
+            index.refresh()
+            row = index.find(image_file, det)
+            if row is not None:
+                return index, row
+        return None, None
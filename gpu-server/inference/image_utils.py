@@ -49,16 +49,39 @@ def save_annotated_image(image_path: str, detections: list) -> str:
     print(f"Saved annotated image to {save_path}")
     return save_path
 
-def log_predictions(image_path: str, detections: list, log_file: str = "logs/predictions.jsonl") -> None:
+def log_predictions(image_path: str, detections: list, log_file: str = "logs/predictions.jsonl",
+                    metadata: dict = None, model_version: dict = None, degradation: dict = None,
+                    detection: dict = None) -> None:
     """
     Append detection results to the prediction log.
+    Any metadata sent by the Pi (e.g. encoding settings) is stored alongside,
+    as are the detector/classifier version, degradation level and detection mode that produced the detections.
     """
     log_entry = {
         "timestamp": datetime.utcnow().isoformat(),
         "image_file": os.path.basename(image_path),
         "detections": detections
     }
+    if model_version:
+        log_entry["model_version"] = model_version
+    if degradation:
+        log_entry["degradation"] = degradation
+    if detection:
+        log_entry["detection"] = detection
+    if metadata and metadata.get("trace"):
+        log_entry["trace_id"] = metadata["trace"].get("id")
+    if metadata:
+        log_entry["metadata"] = metadata
     with open(log_file, "a") as f:
         f.write(json.dumps(log_entry) + "\n")
     print(f"Logged predictions to {log_file}")
 
+
+def log_trace(trace: dict, image_path: str, detections: list, log_file: str = "logs/traces.jsonl") -> None:
+    """
+    Append one frame's end-to-end trace (Pi and server timestamps) to the trace log,
+    whether or not anything was detected. Read by latency_report.py.
+    """
+    entry = dict(trace, image_file=os.path.basename(image_path), detections=len(detections))
+    with open(log_file, "a") as f:
+        f.write(json.dumps(entry) + "\n")
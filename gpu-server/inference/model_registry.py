@@ -0,0 +1,153 @@
+# inference/model_registry.py
+
+import gc
+import threading
+import time
+import torch
+from PIL import Image
+from inference.detector import load_detector, DEFAULT_DETECTOR
+from inference.classifier import BirdClassifier, DEFAULT_CLASSIFIER
+from inference.cascade import CascadeClassifier
+
+DEFAULT_CASCADE_THRESHOLD = 0.8
+
+class ModelSet:
+    """
+    A detector, classifier cascade and the version that identifies them in the logs.
+    Never modified after creation, so a frame can keep using the set it started with.
+    """
+
+    def __init__(self, detector, classifier, fast_classifier, version):
+        self.detector = detector
+        self.classifier = classifier
+        self.fast_classifier = fast_classifier
+        self.cascade = CascadeClassifier(classifier, fast_classifier, version["cascade_threshold"])
+        self.version = version
+
+
+class ModelRegistry:
+    """
+    Holds the active models and swaps in new versions without stopping inference.
+
+    A new detector or classifier is loaded and warmed up on a background
+    thread while the current set keeps serving frames. The switch is a single
+    reference swap under a lock, so each frame runs entirely on either the old
+    or the new set. The old models are released once the last frame using
+    them finishes.
+    """
+
+    def __init__(self, device, detector_name=DEFAULT_DETECTOR, classifier_name=DEFAULT_CLASSIFIER,
+                 fast_classifier_name=None, cascade_threshold=DEFAULT_CASCADE_THRESHOLD):
+        self.device = device
+        self._lock = threading.Lock()
+        self._loader = None
+        self.last_error = None
+        self.last_load_seconds = None
+        self._models = self._build({
+            "detector": detector_name,
+            "classifier": classifier_name,
+            "fast_classifier": fast_classifier_name or None,
+            "cascade_threshold": float(cascade_threshold),
+        }, current=None)
+
+    def current(self) -> ModelSet:
+        """Returns the active model set. Call once per frame and use it for the whole frame."""
+        with self._lock:
+            return self._models
+
+    def is_loading(self) -> bool:
+        return self._loader is not None and self._loader.is_alive()
+
+    def status(self) -> dict:
+        models = self.current()
+        return {
+            "version": models.version,
+            "cascade_counts": dict(models.cascade.counts),
+            "loading": self.is_loading(),
+            "last_error": self.last_error,
+            "last_load_seconds": self.last_load_seconds,
+        }
+
+    def load(self, detector_name=None, classifier_name=None, fast_classifier_name=None, cascade_threshold=None) -> bool:
+        """
+        Starts loading a new version in the background. Arguments left as None keep the current
+        setting; an empty fast_classifier_name turns the cascade off.
+        Returns False if another load is still running.
+        """
+        changes = {
+            "detector": detector_name,
+            "classifier": classifier_name,
+            "fast_classifier": fast_classifier_name,
+            "cascade_threshold": None if cascade_threshold is None else float(cascade_threshold),
+        }
+        with self._lock:
+            if self.is_loading():
+                return False
+            self._loader = threading.Thread(target=self._load, args=(changes,), daemon=True)
+            self._loader.start()
+        return True
+
+    def _load(self, changes):
+        current = self.current()
+        version = dict(current.version)
+        version.update({key: value for key, value in changes.items() if value is not None})
+        version["fast_classifier"] = version["fast_classifier"] or None
+        start = time.monotonic()
+        try:
+            models = self._build(version, current=current)
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            print(f"[Models] Load of {version} failed, keeping {current.version}: {e}")
+            return
+
+        with self._lock:
+            self._models = models
+        self.last_error = None
+        self.last_load_seconds = round(time.monotonic() - start, 1)
+        print(f"[Models] Switched to {models.version} (loaded in {self.last_load_seconds}s)")
+
+        # Drop our references; memory is returned once any in-flight frame on the old set finishes
+        del current
+        self._release()
+
+    def _build(self, version, current=None) -> ModelSet:
+        # Unchanged models are shared with the current set instead of loaded twice
+        def reuse(key, attr):
+            if current is not None and current.version[key] == version[key]:
+                return getattr(current, attr)
+            return None
+
+        detector = reuse("detector", "detector")
+        if detector is None:
+            print(f"[Models] Loading detector {version['detector']}...")
+            detector = load_detector(self.device, version["detector"])
+
+        classifier = reuse("classifier", "classifier")
+        if classifier is None:
+            print(f"[Models] Loading classifier {version['classifier']}...")
+            classifier = BirdClassifier(model_name=version["classifier"], device=self.device)
+
+        fast_classifier = None
+        if version["fast_classifier"]:
+            fast_classifier = reuse("fast_classifier", "fast_classifier")
+            if fast_classifier is None:
+                print(f"[Models] Loading fast classifier {version['fast_classifier']}...")
+                fast_classifier = BirdClassifier(model_name=version["fast_classifier"], device=self.device)
+
+        models = ModelSet(detector, classifier, fast_classifier, version)
+        self._warm_up(models)
+        return models
+
+    def _warm_up(self, models):
+        # First calls pay for CUDA kernel selection and allocator growth; do that before going live
+        blank = Image.new("RGB", (224, 224))
+        with torch.no_grad():
+            models.detector(torch.zeros(1, 3, 480, 640, device=self.device))
+        models.classifier.predict(blank)
+        if models.fast_classifier is not None:
+            models.fast_classifier.predict(blank)
+
+    def _release(self):
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
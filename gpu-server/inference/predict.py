@@ -6,77 +6,214 @@ import json
 import os
 import numpy as np
 import shutil
+import time
 from datetime import datetime
 from PIL import Image
-from inference.detector import load_detector
-from inference.classifier import BirdClassifier
+from dotenv import load_dotenv
+from inference.model_registry import ModelRegistry, DEFAULT_CASCADE_THRESHOLD
+from inference.detector import DEFAULT_DETECTOR
+from inference.classifier import DEFAULT_CLASSIFIER
+from inference.embedding_index import EmbeddingStore
+from inference.batch import extract_crops
+from inference.detector import native_input_size
+from inference.tiled_detection import tiled_detect, motion_regions
+from inference.degradation import FULL_SETTINGS, DETECT_ONLY, LEVEL_NAMES
 from inference.image_utils import (
     preprocess_image,
     save_annotated_image,
     log_predictions,
+    log_trace,
 )
 
-# === Load models once ===
+# Imported by mqtt_receiver before it loads .env; model settings below must see it
+load_dotenv()
+
+# === Load models once; new versions are swapped in via registry.load() ===
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-detector = load_detector(device)
-classifier = BirdClassifier(device=device)
+registry = ModelRegistry(
+    device,
+    detector_name=os.getenv("DETECTOR_MODEL", DEFAULT_DETECTOR),
+    classifier_name=os.getenv("CLASSIFIER_MODEL", DEFAULT_CLASSIFIER),
+    fast_classifier_name=os.getenv("FAST_CLASSIFIER_MODEL"),
+    cascade_threshold=float(os.getenv("CASCADE_THRESHOLD", DEFAULT_CASCADE_THRESHOLD)),
+)
 
 STATIC_DIR = "static"
 os.makedirs(STATIC_DIR, exist_ok=True)
 
-def predict(image_path, conf_threshold=0.5):
-    # === Load image ===
-    image_bgr = cv2.imread(image_path)
-    if image_bgr is None:
-        raise ValueError(f"Failed to load image: {image_path}")
-    image_rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
-    input_tensor = preprocess_image(image_rgb).unsqueeze(0).to(device)
-
-    # === Run object detection ===
-    with torch.no_grad():
-        outputs = detector(input_tensor)[0]
-
-    boxes = outputs["boxes"]
-    scores = outputs["scores"]
-    labels = outputs["labels"]
+# "full": one detector pass over the frame; "tiled": coarse-to-fine tiles for small, distant birds
+DETECTION_MODE = os.getenv("DETECTION_MODE", "full")
 
-    results = []
-    for box, score, label in zip(boxes, scores, labels):
-        if score.item() < conf_threshold:
-            continue
+# Crop embeddings for "find similar sightings"; set EMBEDDING_DIR empty to disable
+EMBEDDING_DIR = os.getenv("EMBEDDING_DIR", "embeddings")
+embedding_store = EmbeddingStore(EMBEDDING_DIR) if EMBEDDING_DIR else None
 
-        x1, y1, x2, y2 = map(int, box.tolist())
-        crop = image_rgb[y1:y2, x1:x2]
-
-        if crop.shape[0] < 10 or crop.shape[1] < 10:
-            print(f"Skipping tiny crop: {crop.shape}")
+def index_embeddings(image_path, results, embeddings, timestamp):
+    """Adds each logged detection's embedding to the index of the model that produced it."""
+    image_file = os.path.basename(image_path)
+    for det_index, (det, (model_name, embedding)) in enumerate(zip(results, embeddings)):
+        if embedding is None:
             continue
-
+        try:
+            embedding_store.add(model_name, embedding, {
+                "image_file": image_file,
+                "det": det_index,
+                "species": det["species"],
+                "confidence": det["confidence"],
+                "timestamp": timestamp,
+            })
+        except Exception as e:
+            print(f"[!] Could not index embedding for {image_file}: {e}")
+
+def classify_crops(models, crops):
+    """Classifies (box, score, label, crop) tuples; returns (results, embeddings)."""
+    results = []
+    embeddings = []
+    for (x1, y1, x2, y2), score, label, crop in crops:
         crop_pil = Image.fromarray(crop)
-        species, confidence = classifier.predict(crop_pil)
-        print(f"Predicted: {species} ({confidence:.2f})")
+        species, confidence, stage, embedding = models.cascade.classify(crop_pil, return_embedding=True)
+        print(f"Predicted: {species} ({confidence:.2f}, {stage} stage)")
 
         results.append({
             "box": [x1, y1, x2, y2],
-            "score": round(score.item(), 3),
-            "label": f"object_{label.item()}",
+            "score": round(score, 3),
+            "label": f"object_{label}",
             "species": species,
-            "confidence": round(confidence, 3)
+            "confidence": round(confidence, 3),
+            "stage": stage
         })
+        embeddings.append((models.cascade.model_for(stage).model_name, embedding))
+    return results, embeddings
+
+def publish_results(image_path, results, embeddings, models, metadata, degradation, annotate=True, detection=None):
+    """Writes the gallery image, the prediction log entry and the crop embeddings."""
+    trace = (metadata or {}).get("trace")
+    if annotate:
+        annotated_path = save_annotated_image(image_path, results)
+    else:
+        # Under load: show the frame as received instead of decoding and re-encoding it
+        name, _ = os.path.splitext(os.path.basename(image_path))
+        annotated_path = os.path.join(STATIC_DIR, f"{name}_annotated.jpg")
+        shutil.copy(image_path, annotated_path)
+
+    # Copy to static/ for gallery
+    static_path = os.path.join(STATIC_DIR, os.path.basename(annotated_path))
+    if annotated_path != static_path:
+        shutil.copy(annotated_path, static_path)
+        print(f"[✔] Copied to gallery: {static_path}")
+
+    # The entry appears in the gallery once it is logged
+    if trace is not None and "gallery_ts" not in trace:
+        trace["gallery_ts"] = time.time()
+    log_predictions(image_path, results, metadata=metadata, model_version=models.version,
+                    degradation=degradation, detection=detection)
+    if embedding_store is not None and embeddings:
+        index_embeddings(image_path, results, embeddings, datetime.utcnow().isoformat())
+
+def predict(image_path, conf_threshold=0.5, metadata=None, degradation=None, detection_mode=None):
+    """
+    Detects and classifies birds in one image, then annotates, logs and indexes the results.
+
+    `detection_mode` overrides DETECTION_MODE. In "tiled" mode, motion regions sent with
+    the frame (metadata["motion"]) are tiled alongside the coarse pass's proposals.
+
+    `degradation` comes from DegradationController.settings() and trades quality for
+    speed under load (None runs at full quality). At the detection-only level the
+    results have no species yet; pass them to backfill() when the server is idle.
+    """
+    settings = degradation or FULL_SETTINGS
+    # Server-side stages are stamped onto the frame's trace (metadata["trace"]) if it has one
+    trace = (metadata or {}).get("trace")
+    if trace is not None:
+        trace["inference_start_ts"] = time.time()
+
+    # === Load image ===
+    image_bgr = cv2.imread(image_path)
+    if image_bgr is None:
+        if trace is not None:
+            # Still logged, so the latency report counts frames that never got to inference
+            trace.update(error="decode_failed", inference_end_ts=time.time(), degradation_level=settings["level"])
+            log_trace(trace, image_path, [])
+        raise ValueError(f"Failed to load image: {image_path}")
+    image_rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
+
+    # One snapshot per frame so a model swap never mixes versions within a frame
+    models = registry.current()
+    degradation_info = {"level": settings["level"], "name": settings["name"]}
+    detection_info = {"mode": "full"}
+
+    # === Run object detection ===
+    scale = 1.0
+    max_side = settings["detector_max_side"]
+    if max_side and max(image_rgb.shape[:2]) > max_side:
+        # Degraded: a single pass on a smaller image, never tiled
+        detection_info = {"mode": "downscaled", "scale": round(max_side / max(image_rgb.shape[:2]), 3)}
+        scale = max_side / max(image_rgb.shape[:2])
+        detector_input = cv2.resize(image_rgb, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        with native_input_size(models.detector, detector_input.shape):
+            with torch.no_grad():
+                outputs = models.detector(preprocess_image(detector_input).unsqueeze(0).to(device))[0]
+    elif (detection_mode or DETECTION_MODE) == "tiled" and not max_side:
+        regions = motion_regions(metadata, (image_rgb.shape[1], image_rgb.shape[0]))
+        outputs, tile_stats = tiled_detect(models.detector, image_rgb, device, regions=regions)
+        detection_info = tile_stats
+        if tile_stats["mode"] == "tiled":
+            print(f"[Tiled] {tile_stats['tiles']} tiles ({tile_stats['regions']} motion regions), "
+                  f"{tile_stats['pixel_ratio']:.2f}x full-frame pixels")
+    else:
+        with torch.no_grad():
+            outputs = models.detector(preprocess_image(image_rgb).unsqueeze(0).to(device))[0]
+
+    # Detections come sorted by score, so a cap keeps the most confident crops
+    crops = extract_crops(image_rgb, outputs, conf_threshold, scale)
+    if settings["max_crops"] and len(crops) > settings["max_crops"]:
+        degradation_info["crops_skipped"] = len(crops) - settings["max_crops"]
+        crops = crops[:settings["max_crops"]]
+
+    if settings["classify"]:
+        results, embeddings = classify_crops(models, crops)
+    else:
+        # Classification deferred to backfill(); species stays empty until then
+        results = [{"box": box, "score": round(score, 3), "label": f"object_{label}",
+                    "species": None, "confidence": None, "stage": "deferred"}
+                   for box, score, label, _ in crops]
+        embeddings = []
+
+    if trace is not None:
+        trace["inference_end_ts"] = time.time()
 
     # === Postprocessing ===
     if results:
-        annotated_path = save_annotated_image(image_path, results)
-        log_predictions(image_path, results)
+        publish_results(image_path, results, embeddings, models, metadata, degradation_info,
+                        annotate=settings["annotate"], detection=detection_info)
 
-        # Copy to static/ for gallery
-        static_path = os.path.join(STATIC_DIR, os.path.basename(annotated_path))
-        if annotated_path != static_path:
-            shutil.copy(annotated_path, static_path)
-            print(f"[✔] Copied to gallery: {static_path}")
+    if trace is not None:
+        trace["degradation_level"] = settings["level"]
+        log_trace(trace, image_path, results)
 
     return results
 
+def backfill(image_path, detections, metadata=None):
+    """
+    Classifies the boxes of a detection-only result (see predict()) and logs the
+    completed entry, which supersedes the detection-only one in the gallery.
+    """
+    image_bgr = cv2.imread(image_path)
+    if image_bgr is None:
+        raise ValueError(f"Failed to load image: {image_path}")
+    image_rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
+
+    models = registry.current()
+    crops = []
+    for det in detections:
+        x1, y1, x2, y2 = det["box"]
+        crops.append((det["box"], det["score"], det["label"].replace("object_", ""), image_rgb[y1:y2, x1:x2]))
+    results, embeddings = classify_crops(models, crops)
+    if results:
+        degradation_info = {"level": DETECT_ONLY, "name": LEVEL_NAMES[DETECT_ONLY], "backfilled": True}
+        publish_results(image_path, results, embeddings, models, metadata, degradation_info)
+    return results
+
 if __name__ == "__main__":
     test_img = "test.jpg"
     preds = predict(test_img)
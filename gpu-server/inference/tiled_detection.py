@@ -0,0 +1,146 @@
+# inference/tiled_detection.py
+
+import math
+import cv2
+import torch
+import torchvision
+from inference.image_utils import preprocess_image
+from inference.detector import native_input_size
+
+def motion_regions(metadata, image_size):
+    """
+    Motion boxes sent by the Pi (metadata["motion"]), scaled to the received image's (width, height).
+    """
+    motion = (metadata or {}).get("motion") or {}
+    boxes, frame_size = motion.get("boxes"), motion.get("frame_size")
+    if not boxes or not frame_size:
+        return []
+    sx = image_size[0] / frame_size[0]
+    sy = image_size[1] / frame_size[1]
+    return [[x1 * sx, y1 * sy, x2 * sx, y2 * sy] for x1, y1, x2, y2 in boxes]
+
+def _tile_starts(lo, hi, tile, limit, overlap):
+    """Offsets of `tile`-px windows covering [lo, hi), overlapping by at least `overlap`, inside [0, limit)."""
+    if hi - lo <= tile:
+        centre = (lo + hi) / 2
+        return [int(min(max(0, centre - tile / 2), limit - tile))]
+    count = math.ceil((hi - lo - overlap) / (tile - overlap))
+    step = (hi - lo - tile) / (count - 1)
+    return [int(min(lo + i * step, limit - tile)) for i in range(count)]
+
+def _tiles_around(box, image_size, tile_size, context, overlap):
+    """
+    Full-resolution tile_size windows covering `box` grown `context` times around its centre.
+    Small areas get one centred tile; larger ones a grid, so nothing has to be downscaled.
+    """
+    width, height = image_size
+    tile_w, tile_h = min(tile_size, width), min(tile_size, height)
+    x1, y1, x2, y2 = box
+    cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+    half_w, half_h = (x2 - x1) * context / 2, (y2 - y1) * context / 2
+    lefts = _tile_starts(max(0, cx - half_w), min(width, cx + half_w), tile_w, width, overlap)
+    tops = _tile_starts(max(0, cy - half_h), min(height, cy + half_h), tile_h, height, overlap)
+    return [[left, top, left + tile_w, top + tile_h] for top in tops for left in lefts]
+
+def _box_iou(a, b):
+    return torchvision.ops.box_iou(torch.tensor([a], dtype=torch.float32),
+                                   torch.tensor([b], dtype=torch.float32)).item()
+
+def _run(detector, images, device, batch_size):
+    outputs = []
+    with torch.no_grad():
+        for start in range(0, len(images), batch_size):
+            tensors = [preprocess_image(image).to(device) for image in images[start:start + batch_size]]
+            outputs.extend(detector(tensors))
+    return outputs
+
+def tiled_detect(detector, image_rgb, device, regions=None, coarse_max_side=640, coarse_conf=0.2,
+                 tile_size=640, context=2.0, tile_overlap=64, max_tiles=12, iou_threshold=0.5, batch_size=4):
+    """
+    Coarse-to-fine detection for small, distant birds.
+
+    A cheap pass over a downscaled copy proposes candidate areas, along with
+    any motion regions sent with the frame. Only those areas are cut into
+    full-resolution tiles for a second detector pass, run at the tiles' own size,
+    so small birds are seen at native resolution without running the whole frame
+    at high resolution.
+    Detections from both passes are merged with per-class NMS.
+
+    Parameters:
+        detector: torchvision detection model in eval mode.
+        image_rgb (numpy.ndarray): Full-resolution RGB image.
+        regions (list): Optional [x1, y1, x2, y2] candidate boxes in image coordinates (e.g. motion_regions()).
+        coarse_max_side (int): Longest side of the coarse pass image.
+        coarse_conf (float): Coarse-pass score at which a box becomes a candidate area (kept low for recall).
+        tile_size (int): Tile side in full-resolution pixels; larger areas are split into a grid of tiles.
+        context (float): Area covered around a candidate box, relative to the box size.
+        tile_overlap (int): Minimum overlap in pixels between neighbouring grid tiles.
+        max_tiles (int): Most tiles per frame, motion regions and then highest-scoring candidates first.
+        iou_threshold (float): NMS overlap for merging duplicate detections.
+
+    Returns:
+        tuple: (outputs, stats). outputs has "boxes", "scores" and "labels" tensors in image
+               coordinates sorted by score, like a plain detector call. stats reports the
+               mode ("full" if the frame was too small to tile), tile count and detector
+               input pixels relative to the full-resolution frame.
+    """
+    height, width = image_rgb.shape[:2]
+    scale = min(1.0, coarse_max_side / max(height, width))
+    if scale == 1.0 or (width <= tile_size and height <= tile_size):
+        # Small frame (e.g. the Pi's 640x480 main stream): the coarse pass and every tile would be
+        # the whole frame at native size, so one plain pass with the detector's upscale is better
+        outputs = _run(detector, [image_rgb], device, batch_size)[0]
+        transform = detector.transform
+        input_scale = min(transform.min_size[-1] / min(height, width), transform.max_size / max(height, width))
+        stats = {"mode": "full", "tiles": 0, "regions": len(regions or []),
+                 "pixel_ratio": round(input_scale ** 2, 3)}
+        return outputs, stats
+
+    coarse_image = image_rgb if scale == 1.0 else cv2.resize(image_rgb, None, fx=scale, fy=scale,
+                                                              interpolation=cv2.INTER_AREA)
+    with native_input_size(detector, coarse_image.shape):
+        coarse = _run(detector, [coarse_image], device, batch_size)[0]
+    coarse_boxes = coarse["boxes"].cpu() / scale
+
+    # Candidate areas: motion regions first (they need no score), then coarse proposals by score
+    candidates = [list(map(float, box)) for box in (regions or [])]
+    keep = coarse["scores"].cpu() >= coarse_conf
+    candidates += coarse_boxes[keep].tolist()
+
+    tiles = []
+    for box in candidates:
+        for tile in _tiles_around(box, (width, height), tile_size, context, tile_overlap):
+            if any(_box_iou(tile, other) > 0.5 for other in tiles):
+                continue  # Already covered by a similar tile
+            tiles.append(tile)
+            if len(tiles) >= max_tiles:
+                break
+        if len(tiles) >= max_tiles:
+            break
+
+    boxes, scores, labels = [coarse_boxes], [coarse["scores"].cpu()], [coarse["labels"].cpu()]
+    if tiles:
+        # Every tile has the same size; run them at that size instead of the detector's 800 px rescale
+        crops = [image_rgb[t[1]:t[3], t[0]:t[2]] for t in tiles]
+        with native_input_size(detector, crops[0].shape):
+            tile_outputs = _run(detector, crops, device, batch_size)
+        for (left, top, _, _), output in zip(tiles, tile_outputs):
+            offset = torch.tensor([left, top, left, top], dtype=torch.float32)
+            boxes.append(output["boxes"].cpu() + offset)
+            scores.append(output["scores"].cpu())
+            labels.append(output["labels"].cpu())
+
+    boxes, scores, labels = torch.cat(boxes), torch.cat(scores), torch.cat(labels)
+    keep = torchvision.ops.batched_nms(boxes, scores, labels, iou_threshold)  # Sorted by score
+    outputs = {"boxes": boxes[keep], "scores": scores[keep], "labels": labels[keep]}
+
+    # Both passes run at native size, so these are the pixels the detector actually processed
+    detector_pixels = coarse_image.shape[0] * coarse_image.shape[1]
+    detector_pixels += sum((t[2] - t[0]) * (t[3] - t[1]) for t in tiles)
+    stats = {
+        "mode": "tiled",
+        "tiles": len(tiles),
+        "regions": len(regions or []),
+        "pixel_ratio": round(detector_pixels / (width * height), 3),
+    }
+    return outputs, stats
@@ -0,0 +1,80 @@
+# latency_report.py
+
+import argparse
+import json
+import os
+import time
+from collections import defaultdict
+
+TRACE_LOG = os.path.join("logs", "traces.jsonl")
+
+# (stage name, start timestamp, end timestamp) along the capture -> gallery path
+STAGES = [
+    ("encode", "capture_ts", "encode_ts"),
+    ("publish", "encode_ts", "publish_ts"),      # Includes any time in the Pi's spool
+    ("network", "publish_ts", "receive_ts"),     # Includes chunk transfer and Pi/server clock offset
+    ("queue", "receive_ts", "inference_start_ts"),
+    ("inference", "inference_start_ts", "inference_end_ts"),
+    ("gallery", "inference_end_ts", "gallery_ts"),
+    ("total", "capture_ts", "gallery_ts"),
+]
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def load_traces(path, since=None):
+    traces = []
+    if not os.path.exists(path):
+        return traces
+    with open(path) as f:
+        for line in f:
+            try:
+                trace = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if since and trace.get("receive_ts", 0) < since:
+                continue
+            traces.append(trace)
+    return traces
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-camera capture-to-gallery latency breakdown.")
+    parser.add_argument('--log', default=TRACE_LOG, help="Trace log written by predict()")
+    parser.add_argument('--hours', type=float, help="Only frames received in the last N hours")
+    args = parser.parse_args()
+
+    since = time.time() - args.hours * 3600 if args.hours else None
+    traces = load_traces(args.log, since)
+    if not traces:
+        print(f"[Latency] No traces in {args.log}")
+        return
+
+    by_camera = defaultdict(list)
+    for trace in traces:
+        by_camera[trace.get("camera_id", "unknown")].append(trace)
+
+    for camera_id, camera_traces in sorted(by_camera.items()):
+        detected = sum(1 for t in camera_traces if t.get("detections"))
+        failed = sum(1 for t in camera_traces if t.get("error"))
+        print(f"\n[Latency] Camera {camera_id}: {len(camera_traces)} frames, {detected} with detections, "
+              f"{failed} failed")
+        print(f"  {'stage':<10} {'frames':>7} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+        for stage, start_key, end_key in STAGES:
+            # Failed frames have no real inference time; they still count as received
+            durations = sorted(1000 * (t[end_key] - t[start_key]) for t in camera_traces
+                               if start_key in t and end_key in t and not (t.get("error") and stage == "inference"))
+            if not durations:
+                continue
+            print(f"  {stage:<10} {len(durations):>7} {percentile(durations, 0.5):>9.1f} "
+                  f"{percentile(durations, 0.95):>9.1f} {durations[-1]:>9.1f}")
+
+        negative = sum(1 for t in camera_traces
+                       if "publish_ts" in t and "receive_ts" in t and t["receive_ts"] < t["publish_ts"])
+        if negative:
+            print(f"  Warning: {negative} frames received before they were published; check NTP on the Pi")
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,21 @@
 
 import os
 import base64
+import json
+import struct
 import uuid
 import time
+import queue
+import threading
+from collections import deque
 import paho.mqtt.client as mqtt
 from datetime import datetime
 from dotenv import load_dotenv
 
-from inference.predict import predict
+from inference.predict import predict, backfill
+from inference.degradation import DegradationController
 from inference.image_utils import save_annotated_image, log_predictions
+from chunk_assembler import ChunkAssembler
 
 # === Load environment and configuration ===
 load_dotenv()
@@ -19,10 +26,41 @@ MQTT_PORT = int(os.getenv("MQTT_PORT", 1883))
 MQTT_USERNAME = os.getenv("MQTT_USERNAME")
 MQTT_PASSWORD = os.getenv("MQTT_PASSWORD")
 MQTT_TOPIC = os.getenv("MQTT_TOPIC", "birdscope/image")
+MQTT_CHUNK_TOPIC = os.getenv("MQTT_CHUNK_TOPIC", MQTT_TOPIC + "/chunk")
+
+# Large stills arrive as sequenced chunks; partial transfers are bounded in time and memory
+assembler = ChunkAssembler(
+    timeout=float(os.getenv("CHUNK_TIMEOUT", 60)),
+    max_bytes=int(os.getenv("CHUNK_MAX_MB", 64)) * 1024 * 1024,
+)
+
+# Inference runs on its own thread; the latency target drives the degradation ladder
+degradation = DegradationController(
+    target_latency=float(os.getenv("INFERENCE_TARGET_LATENCY", 5.0)),
+    max_backlog=int(os.getenv("INFERENCE_MAX_BACKLOG", 10)),
+)
+work_queue = queue.Queue()
+deferred = deque(maxlen=int(os.getenv("BACKFILL_MAX", 1000)))  # Detection-only results awaiting classification
 
 IMAGE_DIR = "received_images"
 os.makedirs(IMAGE_DIR, exist_ok=True)
 
+# Pi payload envelope: MAGIC | 4-byte big-endian header length | JSON header | JPEG
+ENVELOPE_MAGIC = b"BSC1"
+_ENVELOPE_LENGTH = struct.Struct(">I")
+
+def unpack_payload(payload: bytes):
+    """
+    Split an incoming payload into (metadata, jpeg_bytes).
+    Raw JPEG payloads from older clients come back with empty metadata.
+    """
+    if not payload.startswith(ENVELOPE_MAGIC):
+        return {}, payload
+    start = len(ENVELOPE_MAGIC) + _ENVELOPE_LENGTH.size
+    (length,) = _ENVELOPE_LENGTH.unpack_from(payload, len(ENVELOPE_MAGIC))
+    metadata = json.loads(payload[start:start + length].decode("utf-8"))
+    return metadata, payload[start + length:]
+
 # === MQTT Handlers ===
 def save_incoming_image(payload_bytes) -> str:
     """
@@ -40,17 +78,72 @@ def save_incoming_image(payload_bytes) -> str:
 def on_connect(client, userdata, flags, rc):
     if rc == 0:
         print(f"[MQTT] Connected successfully to {MQTT_BROKER}:{MQTT_PORT}")
-        client.subscribe(MQTT_TOPIC)
+        client.subscribe([(MQTT_TOPIC, 1), (MQTT_CHUNK_TOPIC, 1)])
     else:
         print(f"[MQTT] Connection failed with code {rc}")
 
 def on_message(client, userdata, msg):
-    print(f"[MQTT] Received message on topic: {msg.topic}")
+    receive_ts = time.time()
+    payload = msg.payload
+    if msg.topic == MQTT_CHUNK_TOPIC:
+        try:
+            header, data = unpack_payload(payload)
+            payload = assembler.add(header, data)
+        except Exception as e:
+            print(f"[!] Bad chunk: {e}")
+            return
+        if payload is None:
+            return  # Waiting for more chunks
+        print(f"[MQTT] Reassembled chunked image ({len(payload)} bytes)")
+    else:
+        print(f"[MQTT] Received message on topic: {msg.topic}")
+
     try:
-        image_path = save_incoming_image(msg.payload)
-        predict(image_path)  # now handles saving + logging
+        metadata, jpeg_bytes = unpack_payload(payload)
+        # Frames from older clients get a server-side trace so they still show up in latency reports
+        trace = metadata.setdefault("trace", {"id": uuid.uuid4().hex, "camera_id": "unknown"})
+        trace["receive_ts"] = receive_ts
+        print(f"[MQTT] Trace {trace['id'][:8]} from {trace.get('camera_id')}")
+        if metadata.get("encoding"):
+            enc = metadata["encoding"]
+            print(f"[MQTT] Frame encoded at quality {enc.get('quality')}, scale {enc.get('scale')} ({enc.get('width')}x{enc.get('height')})")
+        image_path = save_incoming_image(jpeg_bytes)
+        work_queue.put((image_path, metadata, receive_ts))
     except Exception as e:
-        print(f"[!] Error during inference: {e}")
+        print(f"[!] Error handling image: {e}")
+
+def inference_worker(stop_event):
+    """
+    Runs predict() on queued images at the level the degradation controller picks,
+    and classifies deferred detection-only results whenever the queue is empty.
+    """
+    idle_since = None
+    while not stop_event.is_set():
+        try:
+            image_path, metadata, receive_ts = work_queue.get(timeout=0.5)
+        except queue.Empty:
+            # Idle: let the level recover even if no frames arrive, and catch up on deferred work
+            if idle_since is None:
+                idle_since = time.monotonic()
+            degradation.idle(idle_since)
+            if deferred:
+                image_path, detections, metadata = deferred.popleft()
+                try:
+                    backfill(image_path, detections, metadata)
+                    print(f"[Backfill] Classified {os.path.basename(image_path)} ({len(deferred)} left)")
+                except Exception as e:
+                    print(f"[!] Error during backfill: {e}")
+            continue
+
+        idle_since = None
+        settings = degradation.settings()
+        try:
+            results = predict(image_path, metadata=metadata, degradation=settings)  # now handles saving + logging
+            if results and not settings["classify"]:
+                deferred.append((image_path, results, metadata))
+        except Exception as e:
+            print(f"[!] Error during inference: {e}")
+        degradation.record(time.time() - receive_ts, work_queue.qsize())
 
 # === MQTT Client Setup ===
 def run(stop_event=None):
@@ -63,15 +156,16 @@ def run(stop_event=None):
     client.on_message = on_message
     client.connect(MQTT_BROKER, MQTT_PORT)
 
+    stop_event = stop_event or threading.Event()
+    worker = threading.Thread(target=inference_worker, args=(stop_event,), daemon=True)
+    worker.start()
+
     client.loop_start()
     print("[MQTT] Receiver started")
     try:
-        if stop_event:
-            stop_event.wait()
-        else:
-            while True:
-                time.sleep(1)
+        stop_event.wait()
     finally:
+        stop_event.set()
         client.loop_stop()
         client.disconnect()
         print("[MQTT] Receiver stopped")
@@ -0,0 +1,205 @@
+# reprocess.py
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from itertools import islice
+from datetime import datetime
+import cv2
+import torch
+from dotenv import load_dotenv
+
+from inference.model_registry import ModelRegistry, DEFAULT_CASCADE_THRESHOLD
+from inference.detector import DEFAULT_DETECTOR
+from inference.classifier import DEFAULT_CLASSIFIER
+from inference.batch import predict_batch
+
+load_dotenv()
+
+IMAGE_DIR = "received_images"
+OUTPUT_DIR = os.path.join("logs", "reprocess")
+FILENAME_TIME_FORMAT = "%Y%m%d_%H%M%S"  # save_incoming_image names files <time>_<id>.jpg
+REPORT_INTERVAL = 10
+
+def capture_time(filename):
+    """Capture time encoded in a received image's filename, or None."""
+    try:
+        return datetime.strptime(filename[:15], FILENAME_TIME_FORMAT)
+    except ValueError:
+        return None
+
+def list_images(image_dir, start=None, end=None):
+    """Received images captured in [start, end), oldest first."""
+    images = []
+    for name in sorted(os.listdir(image_dir)):
+        if not name.lower().endswith(('.jpg', '.jpeg')):
+            continue
+        captured = capture_time(name)
+        if captured is None:
+            continue
+        if (start and captured < start) or (end and captured >= end):
+            continue
+        images.append(name)
+    return images
+
+def decode_image(path):
+    """Worker-process decode: returns (path, RGB array or None)."""
+    image_bgr = cv2.imread(path)
+    if image_bgr is None:
+        return path, None
+    return path, cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
+
+def decode_bounded(pool, paths, window):
+    """
+    Decodes paths in the pool, yielding (path, RGB array or None) in order. At most
+    `window` images are queued or decoded ahead of the consumer; Pool.imap would
+    decode the whole archive into memory if inference is slower than decoding.
+    """
+    paths = iter(paths)
+    pending = deque(pool.apply_async(decode_image, (path,)) for path in islice(paths, window))
+    while pending:
+        result = pending.popleft().get()
+        path = next(paths, None)
+        if path is not None:
+            pending.append(pool.apply_async(decode_image, (path,)))
+        yield result
+
+def parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d")
+
+def run_tag(version, args):
+    """Deterministic name for a run, so re-running the same command resumes it."""
+    settings = {"version": version, "conf": args.conf, "from": args.start, "to": args.end}
+    return hashlib.sha1(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:8]
+
+# === Checkpointing ===
+def load_checkpoint(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def save_checkpoint(path, checkpoint):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-run detection and classification over archived images.")
+    parser.add_argument('--images', default=IMAGE_DIR, help="Folder of received images")
+    parser.add_argument('--from', dest='start', help="First capture date to include (YYYY-MM-DD)")
+    parser.add_argument('--to', dest='end', help="Last capture date to include (YYYY-MM-DD)")
+    parser.add_argument('--conf', type=float, default=0.5, help="Detection confidence threshold")
+    parser.add_argument('--detector', default=os.getenv("DETECTOR_MODEL", DEFAULT_DETECTOR))
+    parser.add_argument('--classifier', default=os.getenv("CLASSIFIER_MODEL", DEFAULT_CLASSIFIER))
+    parser.add_argument('--fast-classifier', default=os.getenv("FAST_CLASSIFIER_MODEL"))
+    parser.add_argument('--cascade-threshold', type=float,
+                        default=float(os.getenv("CASCADE_THRESHOLD", DEFAULT_CASCADE_THRESHOLD)))
+    parser.add_argument('--batch-size', type=int, default=8, help="Images per detector batch")
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) - 1), help="Decode processes")
+    parser.add_argument('--output', help="Predictions log to write (default: logs/reprocess/<run tag>.jsonl)")
+    args = parser.parse_args()
+
+    start = parse_date(args.start) if args.start else None
+    end = datetime.fromordinal(parse_date(args.end).toordinal() + 1) if args.end else None
+    images = list_images(args.images, start, end)
+    if not images:
+        print(f"[Reprocess] No images in {args.images} for the given dates.")
+        return
+
+    version = {
+        "detector": args.detector,
+        "classifier": args.classifier,
+        "fast_classifier": args.fast_classifier or None,
+        "cascade_threshold": args.cascade_threshold,
+    }
+    tag = run_tag(version, args)
+    output = args.output or os.path.join(OUTPUT_DIR, f"{tag}.jsonl")
+    checkpoint_path = output + ".checkpoint"
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+
+    # Resume: skip finished images and cut any lines written after the last checkpoint
+    checkpoint = load_checkpoint(checkpoint_path)
+    if checkpoint is None:
+        if os.path.exists(output) and os.path.getsize(output):
+            print(f"[Reprocess] {output} exists without a checkpoint; choose another --output.")
+            return
+        checkpoint = {"last_image": "", "processed": 0, "offset": 0}
+    if checkpoint["processed"]:
+        print(f"[Reprocess] Resuming {output} after {checkpoint['last_image']} ({checkpoint['processed']} done)")
+    with open(output, "a") as f:
+        f.truncate(checkpoint["offset"])
+    remaining = [name for name in images if name > checkpoint["last_image"]]
+    print(f"[Reprocess] {len(remaining)} of {len(images)} images to process -> {output}")
+    if not remaining:
+        return
+
+    # Fork the decoders before CUDA is initialized; forked children must not inherit a CUDA context
+    pool = multiprocessing.Pool(args.workers)
+
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    registry = ModelRegistry(device, detector_name=args.detector, classifier_name=args.classifier,
+                             fast_classifier_name=args.fast_classifier, cascade_threshold=args.cascade_threshold)
+    models = registry.current()
+
+    run_info = {"tag": tag, "conf_threshold": args.conf, "reprocessed_at": datetime.utcnow().isoformat()}
+    processed = seen = detections = 0
+    run_start = last_report = time.monotonic()
+    paths = (os.path.join(args.images, name) for name in remaining)
+    try:
+        with open(output, "a") as log:
+            batch = []
+            decoded = decode_bounded(pool, paths, window=args.batch_size * args.workers * 2)
+            for path, image_rgb in decoded:
+                seen += 1
+                if image_rgb is None:
+                    print(f"[!] Could not decode {path}")
+                else:
+                    batch.append((path, image_rgb))
+                if len(batch) < args.batch_size and seen < len(remaining):
+                    continue
+
+                results = predict_batch(models, [image for _, image in batch], device, args.conf)
+                for (image_path, _), dets in zip(batch, results):
+                    name = os.path.basename(image_path)
+                    log.write(json.dumps({
+                        "timestamp": capture_time(name).isoformat(),
+                        "image_file": name,
+                        "detections": dets,
+                        "model_version": models.version,
+                        "reprocess": run_info,
+                    }) + "\n")
+                    detections += len(dets)
+                log.flush()
+
+                processed += len(batch)
+                checkpoint.update(last_image=os.path.basename(path), processed=checkpoint["processed"] + len(batch),
+                                  offset=log.tell())
+                save_checkpoint(checkpoint_path, checkpoint)
+                batch = []
+
+                now = time.monotonic()
+                if now - last_report >= REPORT_INTERVAL:
+                    rate = processed / (now - run_start)
+                    eta = (len(remaining) - seen) / rate if rate else 0
+                    print(f"[Reprocess] {seen}/{len(remaining)} images, {rate:.1f} img/s, "
+                          f"{detections / (now - run_start):.1f} det/s, ETA {eta / 60:.1f} min")
+                    last_report = now
+    except KeyboardInterrupt:
+        print(f"\n[Reprocess] Interrupted after {checkpoint['last_image'] or 'no images'}; re-run to resume.")
+        return
+    finally:
+        pool.terminate()
+
+    elapsed = time.monotonic() - run_start
+    print(f"[Reprocess] Done: {processed} images, {detections} detections in {elapsed:.0f}s "
+          f"({processed / elapsed:.1f} img/s) -> {output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,19 @@
 from flask import Flask, render_template, Response, request, jsonify
 import time
 import cv2
+from utils.mjpeg_broadcaster import MjpegBroadcaster
+from utils.servo_controller import ServoController
 
-def create_app(camera, pan_tilt_helper, motion_detector):
+def create_app(camera, pan_tilt_helper, motion_detector, servo_controller=None):
     app = Flask(__name__)
 
-    servo_1_enabled = True
-    servo_2_enabled = True
+    if servo_controller is None:
+        servo_controller = ServoController(pan_tilt_helper)
 
-    def generate_frames():
+    # One encoder shared by all viewers; it idles when nobody is watching
+    broadcaster = MjpegBroadcaster(camera) if camera is not None else None
+
+    def generate_frames(max_fps=None):
         if camera is None:
             print("Camera not available for streaming. Showing placeholder.")
             dummy_frame = 255 * (cv2.imread('no_camera.jpg') if cv2.haveImageReader('no_camera.jpg') else None)
@@ -22,69 +27,64 @@ def create_app(camera, pan_tilt_helper, motion_detector):
                 b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
             return
 
-        while True:
-            try:
-                frame = camera.capture_array()
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                ret, buffer = cv2.imencode('.jpg', frame_rgb)
-                yield (b'--frame\r\n'
-                    b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
-                time.sleep(0.03)
-            except Exception as e:
-                print(f"Error in camera streaming: {e}")
-                break
-            
+        yield from broadcaster.stream(max_fps)
+
     @app.route('/')
     def index():
         return render_template('index.html')
 
     @app.route('/video_feed')
     def video_feed():
-        return Response(generate_frames(), mimetype='multipart/x-mixed-replace; boundary=frame')
+        # Optional per-viewer cap, e.g. /video_feed?fps=5 for a slow link
+        max_fps = request.args.get('fps', type=float)
+        return Response(generate_frames(max_fps), mimetype='multipart/x-mixed-replace; boundary=frame')
 
     @app.route('/status_json')
     def status_json():
-        return jsonify({
-            "current_pan": pan_tilt_helper.get_current_pan_angle() or 0.0,
-            "current_tilt": pan_tilt_helper.get_current_tilt_angle() or 0.0,
-            "servo_enabled": pan_tilt_helper.is_initialized() and (servo_1_enabled or servo_2_enabled),
-            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
-        })
-
-    # --- Servo control endpoints (move, set absolute, enable) ---
+        # Served from the controller's cached state; no I2C reads per request
+        status = servo_controller.status()
+        status["timestamp"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        return jsonify(status)
+
+    # --- Servo control endpoints (move, set absolute, enable, auto-track) ---
+    # These only update the target; the controller thread coalesces them into rate-limited I2C writes.
     @app.route('/move_pan', methods=['POST'])
     def move_pan():
         angle_offset = request.get_json().get('angle_offset', 0)
-        pan_tilt_helper.set_pan_angle((pan_tilt_helper.get_current_pan_angle() or 0) + angle_offset)
+        servo_controller.move_by(pan=angle_offset)
         return jsonify({"status": "success"})
 
     @app.route('/move_tilt', methods=['POST'])
     def move_tilt():
         angle_offset = request.get_json().get('angle_offset', 0)
-        pan_tilt_helper.set_tilt_angle((pan_tilt_helper.get_current_tilt_angle() or 0) + angle_offset)
+        servo_controller.move_by(tilt=angle_offset)
         return jsonify({"status": "success"})
 
     @app.route('/set_pan_absolute', methods=['POST'])
     def set_pan_absolute():
         angle = request.get_json().get('target_angle')
-        pan_tilt_helper.set_pan_angle(angle)
+        servo_controller.set_target(pan=angle)
         return jsonify({"status": "success", "target_angle": angle})
 
     @app.route('/set_tilt_absolute', methods=['POST'])
     def set_tilt_absolute():
         angle = request.get_json().get('target_angle')
-        pan_tilt_helper.set_tilt_angle(angle)
+        servo_controller.set_target(tilt=angle)
         return jsonify({"status": "success", "target_angle": angle})
 
     @app.route('/enable_servos', methods=['POST'])
     def enable_servos():
-        nonlocal servo_1_enabled, servo_2_enabled
         state = request.get_json().get('state', True)
-        pan_tilt_helper.enable_servo(1, state)
-        pan_tilt_helper.enable_servo(2, state)
-        servo_1_enabled = servo_2_enabled = state
+        servo_controller.enable(state)
         return jsonify({"status": "success", "servos_enabled": state})
 
+    @app.route('/auto_track', methods=['POST'])
+    def auto_track():
+        state = request.get_json().get('state', True)
+        if not servo_controller.set_auto_track(state, motion_detector):
+            return jsonify({"status": "error", "message": "Auto-track unavailable"}), 500
+        return jsonify({"status": "success", "auto_track": state})
+
     @app.route('/test_motion')
     def test_motion():
         try:
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+import argparse
+import time
+from utils.camera import PiCameraCapture
+from utils.motion_detector import MotionDetector
+from utils.motion_zones import MotionZones
+from utils.encoding_controller import EncodingController
+from utils.envelope import pack_message
+from utils.config import load_config
+
+STAGES = ("capture", "blur", "diff", "encode", "publish")
+
+class StageTimer:
+    """Accumulates wall and CPU seconds for one pipeline stage."""
+
+    def __init__(self, times):
+        self.times = times
+
+    def __enter__(self):
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.thread_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.times[0] += time.perf_counter() - self.wall_start
+        self.times[1] += time.thread_time() - self.cpu_start
+        return False
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded clip through the motion pipeline and time each stage.")
+    parser.add_argument('--source', required=True, help="Video file or folder of images to replay")
+    parser.add_argument('--frames', type=int, default=0, help="Stop after this many frames (default: whole clip once)")
+    parser.add_argument('--fps', type=float, help="Pace the replay like a live camera (default: as fast as possible)")
+    parser.add_argument('--encode-all', action='store_true', help="Encode every frame, not only triggered ones")
+    parser.add_argument('--mqtt', action='store_true', help="Really publish triggered frames with send_image (default: envelope only)")
+    args = parser.parse_args()
+
+    config = load_config()
+    camera_config = dict(config.get('camera', {}))
+    camera_config.update(backend="sim", source=args.source, loop=args.frames > 0, fps=args.fps)
+    camera = PiCameraCapture(**camera_config)
+    if camera.camera is None:
+        print("[Bench] Could not open the simulated camera.")
+        return
+
+    motion_config = config.get('motion', {})
+    detector = MotionDetector(
+        camera.camera,
+        threshold=motion_config.get('threshold', 1250),
+        min_blob_area=motion_config.get('min_blob_area', 50),
+        lores_size=camera.lores_size,
+        zones=MotionZones.from_config(motion_config),
+        profile=True
+    )
+    encoder = EncodingController(**config.get('encoding', {}))
+    if args.mqtt:
+        from utils.mqtt_sender import send_image, add_publish_listener
+        add_publish_listener(encoder.record_publish)
+
+    times = {stage: [0.0, 0.0] for stage in ("capture", "encode", "publish")}
+    frames = triggered_frames = triggers = encoded = 0
+    was_motion = False
+    start = time.perf_counter()
+    try:
+        while not args.frames or frames < args.frames:
+            with StageTimer(times["capture"]):
+                frame, luma = camera.capture_streams()
+            if frame is None:
+                break  # End of the clip (capture_streams reports the EOFError)
+            result = detector.analyze(luma)
+            frames += 1
+
+            if result["motion"]:
+                triggered_frames += 1
+                if not was_motion:
+                    triggers += 1
+            was_motion = result["motion"]
+
+            if result["motion"] or args.encode_all:
+                with StageTimer(times["encode"]):
+                    jpeg, metadata = encoder.encode(frame)
+                encoded += 1
+                with StageTimer(times["publish"]):
+                    if args.mqtt and result["motion"]:
+                        send_image(jpeg, metadata)
+                    else:
+                        pack_message(jpeg, metadata)
+    except KeyboardInterrupt:
+        print("\n[Bench] Interrupted.")
+    finally:
+        elapsed = time.perf_counter() - start
+        camera.stop()
+
+    if frames == 0:
+        print("[Bench] No frames replayed.")
+        return
+
+    times.update(detector.stage_times)
+    print(f"[Bench] Source: {args.source}")
+    print(f"[Bench] Frames: {frames} in {elapsed:.2f} s ({frames / elapsed:.1f} frames/s)")
+    print(f"[Bench] Triggers: {triggers} ({triggered_frames} frames with motion), encoded: {encoded}")
+    print(f"[Bench] {'stage':<8} {'wall ms/frame':>14} {'cpu ms/frame':>13} {'cpu ms/call':>12}")
+    for stage in STAGES:
+        wall, cpu = times[stage]
+        calls = encoded if stage in ("encode", "publish") else frames
+        per_call = 1000 * cpu / calls if calls else 0.0
+        print(f"[Bench] {stage:<8} {1000 * wall / frames:>14.2f} {1000 * cpu / frames:>13.2f} {per_call:>12.2f}")
+
+if __name__ == "__main__":
+    main()
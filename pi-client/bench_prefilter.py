@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+import argparse
+import glob
+import os
+import time
+import cv2
+from utils.bird_filter import BirdPreFilter
+from utils.config import load_config
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+def list_images(folder):
+    return sorted(p for p in glob.glob(os.path.join(folder, '**', '*'), recursive=True)
+                  if p.lower().endswith(IMAGE_EXTENSIONS))
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay labelled frames through the bird pre-filter.")
+    parser.add_argument('--bird-dir', required=True, help="Frames that contain a bird")
+    parser.add_argument('--empty-dir', required=True, help="Triggered frames without a bird (wind, cats, people)")
+    parser.add_argument('--model', help="Override prefilter.model_path from config.yaml")
+    parser.add_argument('--threshold', type=float, help="Override prefilter.threshold from config.yaml")
+    args = parser.parse_args()
+
+    settings = dict(load_config().get('prefilter', {}))
+    if args.model:
+        settings['model_path'] = args.model
+    if args.threshold is not None:
+        settings['threshold'] = args.threshold
+
+    prefilter = BirdPreFilter(**settings)
+    if not prefilter.enabled():
+        print("[Bench] No pre-filter model loaded. Set prefilter.model_path or pass --model.")
+        return
+
+    counts = {"tp": 0, "fp": 0, "fn": 0, "tn": 0}
+    total_time = 0.0
+    frames = 0
+    for label, folder in ((True, args.bird_dir), (False, args.empty_dir)):
+        for path in list_images(folder):
+            frame = cv2.imread(path)
+            if frame is None:
+                print(f"[Bench] Skipping unreadable {path}")
+                continue
+            start = time.monotonic()
+            passed, _ = prefilter.check(frame)
+            total_time += time.monotonic() - start
+            frames += 1
+            if label:
+                counts["tp" if passed else "fn"] += 1
+            else:
+                counts["fp" if passed else "tn"] += 1
+
+    if frames == 0:
+        print("[Bench] No images found.")
+        return
+
+    sent = counts["tp"] + counts["fp"]
+    precision = counts["tp"] / sent if sent else 0.0
+    recall = counts["tp"] / (counts["tp"] + counts["fn"]) if counts["tp"] + counts["fn"] else 0.0
+
+    print(f"[Bench] Frames: {frames} ({counts['tp'] + counts['fn']} bird, {counts['fp'] + counts['tn']} empty)")
+    print(f"[Bench] TP={counts['tp']} FP={counts['fp']} FN={counts['fn']} TN={counts['tn']}")
+    print(f"[Bench] Precision: {precision:.3f}  Recall: {recall:.3f}")
+    print(f"[Bench] Frames dropped on device: {frames - sent} ({100 * (frames - sent) / frames:.1f}% less server inference)")
+    print(f"[Bench] Bird frames lost: {counts['fn']}")
+    print(f"[Bench] Pre-filter time: {1000 * total_time / frames:.1f} ms/frame")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+import time
+from utils.camera import PiCameraCapture
+from utils.frame_bus import FrameBus
+from utils.config import load_config
+
+def main():
+    config = load_config()
+    bus_config = config.get('frame_bus', {})
+    main_name = bus_config.get('main_name', 'birdscope_main')
+    lores_name = bus_config.get('lores_name', 'birdscope_lores')
+    slots = bus_config.get('slots', 8)
+
+    print("[Capture] Initializing camera...")
+    camera = PiCameraCapture(**config.get('camera', {}))
+    if camera.camera is None:
+        print("[Capture] Camera not available. Exiting.")
+        return
+
+    frame, luma = camera.capture_streams()
+    if frame is None:
+        print("[Capture] Could not read first frame. Exiting.")
+        camera.stop()
+        return
+
+    main_bus = FrameBus(main_name, shape=frame.shape, slots=slots, create=True)
+    lores_bus = FrameBus(lores_name, shape=luma.shape, slots=slots, create=True)
+
+    print("[Capture] Publishing frames. Start main.py / motion-loop.py with frame_bus.enabled: true.")
+    frames = 0
+    stats_start = time.monotonic()
+    try:
+        while True:
+            frame, luma = camera.capture_streams()
+            if frame is None:
+                time.sleep(0.1)
+                continue
+            now = time.time()
+            # Lores first so a motion reader never sees a luma frame ahead of its main frame
+            lores_bus.publish(luma, now)
+            main_bus.publish(frame, now)
+
+            frames += 1
+            elapsed = time.monotonic() - stats_start
+            if elapsed >= 60:
+                print(f"[Capture] {frames / elapsed:.1f} fps published")
+                frames = 0
+                stats_start = time.monotonic()
+    except KeyboardInterrupt:
+        print("\n[Capture] Interrupted. Exiting.")
+    finally:
+        main_bus.close()
+        lores_bus.close()
+        camera.stop()
+        print("[Capture] Camera stopped and buses removed.")
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,49 @@
 #!/usr/bin/env python3
 import time
 from flask import Flask
-from picamera2 import Picamera2
-from libcamera import Transform
+from utils.backends import create_picamera2, create_pantilt_device, make_transform
 from utils.tilt_controller import PanTiltHelper
+from utils.servo_controller import ServoController
 from utils.motion_detector import MotionDetector
+from utils.frame_bus import BusCamera
+from utils.config import load_config
 from app import create_app
 
+config = load_config()
+bus_config = config.get('frame_bus', {})
+
 # --- Camera ---
-camera = Picamera2()
-camera.configure(camera.create_preview_configuration(main={"size": (640, 480)}, transform=Transform(hflip=True, vflip=True)))
-camera.start()
-time.sleep(1)
+if bus_config.get('enabled'):
+    # Frames come from capture_service.py; the stream and the detector each get their own read cursor
+    camera = BusCamera(bus_config.get('main_name', 'birdscope_main'), bus_config.get('lores_name', 'birdscope_lores'))
+    motion_camera = BusCamera(bus_config.get('main_name', 'birdscope_main'), bus_config.get('lores_name', 'birdscope_lores'))
+else:
+    camera_config = config.get('camera', {})
+    camera = create_picamera2(camera_config.get('backend', 'picamera2'), source=camera_config.get('source'),
+                              loop=camera_config.get('loop', True), fps=camera_config.get('fps'))
+    camera.configure(camera.create_preview_configuration(
+        main={"size": (640, 480)},
+        lores={"size": (320, 240), "format": "YUV420"},  # Luma plane for MotionDetector
+        transform=make_transform(hflip=True, vflip=True)))
+    camera.start()
+    time.sleep(1)
+    motion_camera = camera
 
 # --- PanTilt ---
+tilt_config = config.get('tilt', {})
 pan_tilt_helper = PanTiltHelper(
     idle_timeout=5,
     pan_min_angle=-45, pan_max_angle=45,
-    tilt_min_angle=-30, tilt_max_angle=60
+    tilt_min_angle=-30, tilt_max_angle=60,
+    device=create_pantilt_device(tilt_config.get('backend', 'hat'))
 )
+servo_controller = ServoController(pan_tilt_helper, **tilt_config.get('control', {}))
 
 # --- MotionDetector ---
-motion_detector = MotionDetector(camera)
+motion_detector = MotionDetector(motion_camera)
 
 # --- Create Flask App ---
-app = create_app(camera, pan_tilt_helper, motion_detector)
+app = create_app(camera, pan_tilt_helper, motion_detector, servo_controller)
 
 if __name__ == '__main__':
     print("Visit http://<pi-ip>:5050/ to control Pan/Tilt HAT and view live camera feed.")
@@ -32,6 +51,9 @@ if __name__ == '__main__':
         app.run(host='0.0.0.0', port=5050)
     finally:
         print("Shutting down camera.")
+        servo_controller.stop()
         camera.stop()
         camera.close()
+        if motion_camera is not camera:
+            motion_camera.close()
 
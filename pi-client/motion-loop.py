@@ -2,41 +2,162 @@
 
 import time
 from utils.camera import PiCameraCapture
-from utils.motion_detector import MotionDetector
-from utils.image_utils import encode_image_to_jpeg
-from utils.mqtt_sender import send_image, send_status
+from utils.frame_bus import BusCamera
+from utils.motion_detector import MotionDetector, scale_box
+from utils.motion_zones import MotionZones
+from utils.encoding_controller import EncodingController
+from utils.mqtt_sender import send_image, send_status, add_publish_listener
+from utils.frame_scheduler import AdaptiveScheduler
+from utils.frame_selector import PreTriggerBuffer, select_best_frames
+from utils.bird_filter import BirdPreFilter
+from utils.envelope import new_trace
+from utils.config import load_config
 
 COOLDOWN_SECONDS = 30
 
+def capture_burst(camera, detector, count, interval):
+    """
+    Captures a short burst of frames right after a trigger, with their motion boxes in frame coordinates.
+    The burst only samples motion boxes; it doesn't feed the background model.
+    """
+    burst = []
+    for _ in range(count):
+        frame, luma = camera.capture_streams()
+        if frame is None:
+            continue
+        result = detector.analyze(luma, learn=False)
+        box = scale_box(result["box"], result["frame_size"], (frame.shape[1], frame.shape[0])) if result["box"] else None
+        burst.append({"timestamp": time.time(), "frame": frame, "box": box})
+        time.sleep(interval)
+    return burst
+
 def main():
+    config = load_config()
+    cooldown = config.get('cooldown', COOLDOWN_SECONDS)
+    trigger_config = config.get('trigger', {})
+    pre_trigger_frames = trigger_config.get('pre_trigger_frames', 8)
+    pre_trigger_age = trigger_config.get('pre_trigger_age', 3.0)
+    # Main frames are only captured for the buffer once motion reaches this fraction of a zone's threshold
+    pre_trigger_arm_level = trigger_config.get('pre_trigger_arm_level', 0.3)
+    burst_frames = trigger_config.get('burst_frames', 4)
+    burst_interval = trigger_config.get('burst_interval', 0.1)
+    send_best = trigger_config.get('send_best', 1)
+    still_capture = trigger_config.get('still_capture', False)
+    # After the pre-filter rejects a trigger (cat, person), skip bursts for this long
+    reject_cooldown = trigger_config.get('reject_cooldown', 10)
+    camera_id = config.get('camera_id')  # Defaults to the hostname
+
     print("[MotionLoop] Initializing camera and motion detector...")
-    camera = PiCameraCapture()
-    detector = MotionDetector(camera.camera)
+    bus_config = config.get('frame_bus', {})
+    if bus_config.get('enabled'):
+        camera = BusCamera(bus_config.get('main_name', 'birdscope_main'), bus_config.get('lores_name', 'birdscope_lores'))
+    else:
+        camera = PiCameraCapture(**config.get('camera', {}))
+    motion_config = config.get('motion', {})
+    detector = MotionDetector(
+        camera.camera,
+        threshold=motion_config.get('threshold', 1250),
+        min_blob_area=motion_config.get('min_blob_area', 50),
+        lores_size=camera.lores_size,
+        zones=MotionZones.from_config(motion_config)
+    )
+    scheduler = AdaptiveScheduler(**config.get('scheduler', {}))
+    pre_trigger = PreTriggerBuffer(pre_trigger_frames) if pre_trigger_frames else None
+    encoder = EncodingController(**config.get('encoding', {}))
+    add_publish_listener(encoder.record_publish)
+    prefilter = BirdPreFilter(**config.get('prefilter', {}))
 
     last_sent_time = 0
+    last_rejected_time = 0
+    armed = False
 
     print("[MotionLoop] Starting motion detection loop...")
     while True:
         try:
-            motion = detector.detect_motion()
+            scheduler.start_tick()
+            if pre_trigger is not None and armed:
+                frame, luma = camera.capture_streams()
+            else:
+                # Quiet scene: lores-only detection, no full-resolution frame to copy
+                frame, luma = None, camera.capture_luma()
+            result = detector.analyze(luma)
             now = time.time()
 
-            if motion:
-                print(f"[MotionLoop] Motion detected at {time.strftime('%H:%M:%S')}")
+            box = None
+            if frame is not None and result["box"]:
+                box = scale_box(result["box"], result["frame_size"], (frame.shape[1], frame.shape[0]))
+
+            consumed = False
+            if result["motion"]:
+                print(f"[MotionLoop] Motion detected at {time.strftime('%H:%M:%S')} in zone '{result['zone']}' (score {result['score']}, box {result['box']})")
+
+                if now - last_sent_time >= cooldown and now - last_rejected_time >= reject_cooldown:
+                    consumed = True
+                    candidates = pre_trigger.drain(pre_trigger_age) if pre_trigger is not None else []
+                    if frame is not None:
+                        candidates.append({"timestamp": now, "frame": frame, "box": box})
+                    candidates += capture_burst(camera, detector, burst_frames, burst_interval)
+                    still_choice = None
+                    if still_capture:
+                        still = camera.capture_still()
+                        if still is not None:
+                            # Latest motion box, rescaled onto the full-sensor still
+                            still_box = scale_box(result["box"], result["frame_size"], (still.shape[1], still.shape[0])) if result["box"] else None
+                            still_choice = {"timestamp": time.time(), "frame": still, "box": still_box}
+                    if not candidates and still_choice is None:
+                        candidates = [{"timestamp": now, "frame": camera.capture_frame(), "box": None}]
 
-                if now - last_sent_time >= COOLDOWN_SECONDS:
-                    frame = camera.capture_frame()
-                    jpeg = encode_image_to_jpeg(frame)
+                    reference = box or next((c["box"] for c in reversed(candidates) if c["box"]), None)
+                    # The still goes first: sharpness is scored at thumbnail size, so ranking it against
+                    # the burst would throw away its extra pixels. Low-res frames fill the remaining slots.
+                    ranked = [still_choice] if still_choice is not None else []
+                    low_res = [c for c in candidates if c["frame"] is not None]
+                    ranked += select_best_frames(low_res, reference, len(low_res))
+                    sent = rejected = 0
+                    # Walk down the ranking until send_best frames pass, so one rejected frame
+                    # (a person crossing in front) doesn't discard the rest unchecked
+                    for choice in ranked:
+                        if sent >= send_best:
+                            break
+                        passed, prefilter_info = prefilter.check(choice["frame"])
+                        if not passed:
+                            rejected += 1
+                            print(f"[MotionLoop] Pre-filter rejected frame (bird score {prefilter_info['score']:.2f})")
+                            continue
+                        trace = new_trace(choice["timestamp"], camera_id)
+                        jpeg, metadata = encoder.encode(choice["frame"])
+                        if jpeg:
+                            trace["encode_ts"] = time.time()
+                            metadata["trace"] = trace
+                            if choice["box"]:
+                                # Lets the server tile the moving area at full resolution
+                                height, width = choice["frame"].shape[:2]
+                                metadata["motion"] = {"boxes": [choice["box"]], "frame_size": [width, height]}
+                            if prefilter_info:
+                                metadata["prefilter"] = prefilter_info
+                            send_image(jpeg, metadata)
+                            sent += 1
+                        else:
+                            print("[MotionLoop] Failed to encode image.")
 
-                    if jpeg:
-                        send_image(jpeg)
-                        send_status("Motion image sent")
+                    if sent:
+                        send_status(f"Motion image sent (zone {result['zone']}, box {result['box']}, "
+                                    f"best {sent} of {len(candidates)} frames)")
                         last_sent_time = now
-                    else:
-                        print("[MotionLoop] Failed to encode image.")
+                    elif rejected and rejected == len(ranked):
+                        # Every candidate failed the pre-filter; back off before the next burst
+                        send_status(f"Motion in zone {result['zone']} dropped by bird pre-filter")
+                        last_rejected_time = now
                 else:
-                    remaining = COOLDOWN_SECONDS - (now - last_sent_time)
+                    remaining = max(cooldown - (now - last_sent_time), reject_cooldown - (now - last_rejected_time))
                     print(f"[MotionLoop] Cooldown active ({remaining:.1f}s remaining)")
+
+            if pre_trigger is not None and frame is not None and not consumed:
+                pre_trigger.append(frame, box, now)
+
+            armed = result["level"] >= pre_trigger_arm_level
+            scheduler.update(result["level"], result["motion"])
+            scheduler.wait()
         except KeyboardInterrupt:
             print("\n[MotionLoop] Interrupted. Exiting.")
             break
@@ -49,4 +170,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
@@ -3,11 +3,13 @@
 import time
 from utils.camera import PiCameraCapture
 from utils.image_utils import encode_image_to_jpeg
-from utils.mqtt_sender import send_image
+from utils.mqtt_sender import send_image, flush
+from utils.envelope import new_trace
 
 def main():
     print("[Test] Initializing camera...")
     camera = PiCameraCapture()
+    trace = new_trace(time.time())
     frame = camera.capture_frame()
 
     if frame is None:
@@ -22,7 +24,9 @@ def main():
         return
 
     print("[Test] Sending image to GPU server...")
-    send_image(jpeg_bytes)
+    trace["encode_ts"] = time.time()
+    send_image(jpeg_bytes, {"trace": trace})
+    flush(timeout=30)  # send_image returns before the image is out
     print("[Test] Done.")
 
     camera.stop()
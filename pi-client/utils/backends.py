@@ -0,0 +1,58 @@
+# pi-client/utils/backends.py
+
+from types import SimpleNamespace
+from utils.fake_pantilt import FakePanTilt
+
+try:
+    from picamera2 import Picamera2
+except ImportError:  # Workstation without the Pi camera stack
+    Picamera2 = None
+
+try:
+    from libcamera import Transform
+except ImportError:
+    Transform = None
+
+CAMERA_BACKENDS = ("picamera2", "sim")
+PANTILT_BACKENDS = ("hat", "fake")
+
+def create_picamera2(backend="picamera2", source=None, loop=True, fps=None):
+    """
+    Creates a Picamera2-compatible camera object for the chosen backend.
+
+    Parameters:
+        backend (str): "picamera2" for the real camera or "sim" to replay a recording.
+        source (str): Video file or image folder for the "sim" backend.
+        loop (bool): Sim only: restart the recording when it ends.
+        fps (float): Sim only: pace captures like a live camera.
+
+    Returns:
+        Picamera2 or SimulatedPicamera2: Unconfigured camera.
+    """
+    if backend == "sim":
+        from utils.sim_camera import SimulatedPicamera2
+        if not source:
+            raise ValueError("The sim camera backend needs camera.source (video file or image folder)")
+        return SimulatedPicamera2(source, loop=loop, fps=fps)
+    if backend != "picamera2":
+        raise ValueError(f"Unknown camera backend '{backend}', expected one of {CAMERA_BACKENDS}")
+    if Picamera2 is None:
+        raise RuntimeError("picamera2 is not installed; use camera.backend: sim on this machine")
+    return Picamera2()
+
+def make_transform(hflip=False, vflip=False):
+    """Returns a libcamera Transform, or a plain stand-in with the same attributes when libcamera is absent."""
+    if Transform is not None:
+        return Transform(hflip=hflip, vflip=vflip)
+    return SimpleNamespace(hflip=hflip, vflip=vflip)
+
+def create_pantilt_device(backend="hat", **kwargs):
+    """
+    Returns a device to inject into PanTiltHelper: None for the real HAT (the helper
+    creates it), or a FakePanTilt for the "fake" backend.
+    """
+    if backend == "fake":
+        return FakePanTilt(**kwargs)
+    if backend != "hat":
+        raise ValueError(f"Unknown pan-tilt backend '{backend}', expected one of {PANTILT_BACKENDS}")
+    return None
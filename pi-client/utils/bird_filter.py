@@ -0,0 +1,100 @@
+# pi-client/utils/bird_filter.py
+
+import os
+import time
+import cv2
+
+class BirdPreFilter:
+    """
+    Optional on-device check that a triggered frame contains something bird-like.
+
+    Runs a small SSD-style detector (e.g. SSD MobileNet v2 COCO exported for
+    OpenCV DNN, or a quantized ONNX SSD) on the CPU. Only frames that already
+    triggered motion are checked, and frames with no bird detection above the
+    threshold are dropped before they use bandwidth and GPU time.
+    If no model is configured the filter passes everything through.
+    """
+
+    def __init__(self, model_path=None, config_path=None, input_size=(300, 300),
+                 bird_class_ids=(16,), threshold=0.4, scale=1 / 127.5,
+                 mean=(127.5, 127.5, 127.5), swap_rb=True, threads=None):
+        """
+        Parameters:
+            model_path (str): Model weights (.pb, .onnx, .caffemodel, ...). Filter disabled if None or missing.
+            config_path (str): Optional network description (.pbtxt, .prototxt).
+            input_size (tuple): Network input (width, height).
+            bird_class_ids (tuple): Class ids treated as "bird" (16 in the COCO label map).
+            threshold (float): Minimum bird confidence for a frame to be sent.
+            scale (float): Pixel scale factor for blobFromImage.
+            mean (tuple): Mean subtracted before scaling.
+            swap_rb (bool): Swap red/blue channels when building the input blob.
+            threads (int): Optional OpenCV thread count (Pi Zero: 1).
+        """
+        self.model_path = model_path
+        self.input_size = tuple(input_size)
+        self.bird_class_ids = set(bird_class_ids)
+        self.threshold = threshold
+        self.scale = scale
+        self.mean = tuple(mean)
+        self.swap_rb = swap_rb
+        self.net = None
+
+        if not model_path:
+            return
+        if not os.path.exists(model_path):
+            print(f"[PreFilter] Model not found at {model_path}, pre-filter disabled.")
+            return
+        try:
+            if threads:
+                cv2.setNumThreads(threads)
+            self.net = cv2.dnn.readNet(model_path, config_path or "")
+            self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+            self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+            print(f"[PreFilter] Loaded {os.path.basename(model_path)} (threshold {threshold})")
+        except Exception as e:
+            print(f"[PreFilter] Could not load model: {e}. Pre-filter disabled.")
+            self.net = None
+
+    def enabled(self):
+        return self.net is not None
+
+    def score(self, frame):
+        """
+        Returns the highest bird confidence in the frame and its normalized [x1, y1, x2, y2] box.
+
+        Expects SSD DetectionOutput rows of [batch, class, confidence, x1, y1, x2, y2].
+        """
+        if frame.ndim == 3 and frame.shape[2] == 4:
+            frame = frame[:, :, :3]
+        blob = cv2.dnn.blobFromImage(frame, self.scale, self.input_size, self.mean, swapRB=self.swap_rb)
+        self.net.setInput(blob)
+        detections = self.net.forward().reshape(-1, 7)
+
+        best_score, best_box = 0.0, None
+        for _, class_id, confidence, x1, y1, x2, y2 in detections:
+            if int(class_id) in self.bird_class_ids and confidence > best_score:
+                best_score = float(confidence)
+                best_box = [round(float(v), 4) for v in (x1, y1, x2, y2)]
+        return best_score, best_box
+
+    def check(self, frame):
+        """
+        Decides whether a frame should be sent.
+
+        Returns:
+            tuple: (passed, info) where info is a dict suitable for message metadata.
+        """
+        if not self.enabled():
+            return True, None
+        start = time.monotonic()
+        bird_score, box = self.score(frame)
+        passed = bird_score >= self.threshold
+        info = {
+            "model": os.path.basename(self.model_path),
+            "score": round(bird_score, 3),
+            "threshold": self.threshold,
+            "passed": passed,
+            "box": box,
+            "seconds": round(time.monotonic() - start, 3),
+        }
+        return passed, info
@@ -1,15 +1,16 @@
 # pi-client/camera.py
 
-from picamera2 import Picamera2, Preview
 import cv2
 import time
+from utils.backends import create_picamera2
 
 class PiCameraCapture:
     """
     Manages image capture from the Raspberry Pi Camera Module v2 using Picamera2.
     """
 
-    def __init__(self, resolution=(640, 480), flip_horizontal=True, flip_vertical=True):
+    def __init__(self, resolution=(640, 480), flip_horizontal=True, flip_vertical=True, lores_size=(320, 240),
+                 backend="picamera2", **backend_options):
         """
         Initializes the camera with a specified resolution and optional flipping.
 
@@ -17,21 +18,31 @@ class PiCameraCapture:
             resolution (tuple): Desired resolution (width, height) for image capture.
             flip_horizontal (bool): Whether to flip the captured image horizontally.
             flip_vertical (bool): Whether to flip the captured image vertically.
+            lores_size (tuple): Resolution (width, height) of the YUV420 lores stream used for motion detection.
+            backend (str): "picamera2" for the real camera or "sim" to replay a recording (see utils/backends.py).
+            backend_options: Backend-specific options, e.g. source="clip.mp4", fps=10 for "sim".
         """
         self.camera = None
-        self.resolution = resolution
+        self.still_config = None
+        self.resolution = tuple(resolution)
+        self.lores_size = tuple(lores_size)
         self.flip_horizontal = flip_horizontal
         self.flip_vertical = flip_vertical
 
         try:
-            self.camera = Picamera2()
+            self.camera = create_picamera2(backend, **backend_options)
             # Create a still configuration for capturing high-resolution images
             # or a preview configuration for faster, lower-res grabs
             # Using preview_configuration for general purpose captures as discussed for streaming
             camera_config = self.camera.create_preview_configuration(
-                main={"size": resolution, "format": "RGB888"} # Capture in RGB format
+                main={"size": self.resolution, "format": "RGB888"}, # Capture in RGB format
+                lores={"size": self.lores_size, "format": "YUV420"} # Cheap luma plane for motion detection
             )
             self.camera.configure(camera_config)
+            # Full-sensor still mode, switched to briefly on trigger (see capture_still)
+            self.still_config = self.camera.create_still_configuration(
+                main={"format": "RGB888"}
+            )
             self.camera.start()
             # Allow camera to warm up
             time.sleep(1)
@@ -43,6 +54,23 @@ class PiCameraCapture:
             print(f"Error initializing PiCamera2: {e}")
             self.camera = None # Indicate camera failure
 
+    def _apply_flip(self, frame):
+        """
+        Applies the configured flipping to a frame.
+        """
+        flip_code = 0 # Default no flip
+        if self.flip_horizontal and self.flip_vertical:
+            flip_code = -1 # Both axes
+        elif self.flip_horizontal:
+            flip_code = 1  # Horizontal only
+        elif self.flip_vertical:
+            flip_code = 0  # Vertical only (this is already set by default above if no flip)
+
+        if flip_code != 0: # Only flip if a flip is actually required
+            frame = cv2.flip(frame, flip_code)
+
+        return frame
+
     def capture_frame(self):
         """
         Captures a single frame from the camera as a NumPy array.
@@ -58,23 +86,71 @@ class PiCameraCapture:
             # Capture as a NumPy array
             frame = self.camera.capture_array() # This returns an array in RGB888 as configured
             
-            # Apply flipping if configured
-            flip_code = 0 # Default no flip
-            if self.flip_horizontal and self.flip_vertical:
-                flip_code = -1 # Both axes
-            elif self.flip_horizontal:
-                flip_code = 1  # Horizontal only
-            elif self.flip_vertical:
-                flip_code = 0  # Vertical only (this is already set by default above if no flip)
-
-            if flip_code != 0: # Only flip if a flip is actually required
-                frame = cv2.flip(frame, flip_code)
-
-            return frame
+            return self._apply_flip(frame)
         except Exception as e:
             print(f"Error capturing frame: {e}")
             return None
 
+    def capture_luma(self):
+        """
+        Captures the luma (Y) plane of the lores YUV420 stream.
+
+        Returns:
+            numpy.ndarray: 2D uint8 grayscale frame at lores_size, or None if capture fails.
+        """
+        if self.camera is None:
+            print("Camera is not initialized. Cannot capture lores frame.")
+            return None
+        try:
+            yuv = self.camera.capture_array("lores")
+            width, height = self.lores_size
+            # Flip the luma plane the same way as the main frame so motion boxes line up
+            return self._apply_flip(yuv[:height, :width])
+        except Exception as e:
+            print(f"Error capturing lores frame: {e}")
+            return None
+
+    def capture_streams(self):
+        """
+        Captures the main frame and the lores luma plane from the same camera request.
+
+        Returns:
+            tuple: (frame, luma) flipped as configured, or (None, None) if capture fails.
+        """
+        if self.camera is None:
+            print("Camera is not initialized. Cannot capture streams.")
+            return None, None
+        try:
+            request = self.camera.capture_request()
+            try:
+                frame = request.make_array("main")
+                yuv = request.make_array("lores")
+            finally:
+                request.release()
+            width, height = self.lores_size
+            return self._apply_flip(frame), self._apply_flip(yuv[:height, :width])
+        except Exception as e:
+            print(f"Error capturing streams: {e}")
+            return None, None
+
+    def capture_still(self):
+        """
+        Captures a full-sensor-resolution still, then returns to the preview mode.
+        The switch takes a few hundred milliseconds, so use it only on trigger.
+
+        Returns:
+            numpy.ndarray: High-resolution frame (RGB format), or None if capture fails.
+        """
+        if self.camera is None or self.still_config is None:
+            print("Camera is not initialized. Cannot capture still.")
+            return None
+        try:
+            frame = self.camera.switch_mode_and_capture_array(self.still_config, "main")
+            return self._apply_flip(frame)
+        except Exception as e:
+            print(f"Error capturing still: {e}")
+            return None
+
     def stop(self):
         """
         Stops the camera preview and releases resources.
@@ -0,0 +1,22 @@
+# pi-client/utils/config.py
+
+import os
+import yaml
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', 'config.yaml')
+
+def load_config(path=CONFIG_PATH):
+    """
+    Loads the pi-client config.yaml.
+
+    Parameters:
+        path (str): Path to the YAML config file.
+
+    Returns:
+        dict: Parsed configuration, or an empty dict if the file does not exist.
+    """
+    if not os.path.exists(path):
+        print(f"Warning: Config file not found at {path}, using defaults.")
+        return {}
+    with open(path, 'r') as f:
+        return yaml.safe_load(f) or {}
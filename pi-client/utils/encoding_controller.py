@@ -0,0 +1,120 @@
+# pi-client/utils/encoding_controller.py
+
+import threading
+import cv2
+from utils.image_utils import encode_image_to_jpeg
+
+# (scale, quality) steps, cheapest to send last
+DEFAULT_LEVELS = [
+    (1.0, 90), (1.0, 80), (1.0, 70),
+    (0.75, 85), (0.75, 75), (0.75, 65),
+    (0.5, 80), (0.5, 70), (0.5, 60),
+]
+
+class EncodingController:
+    """
+    Picks JPEG quality and downscale factor from measured link performance.
+
+    Image publish times (publish call to broker acknowledgement) give the link
+    throughput, and small status publishes give the acknowledgement latency.
+    The controller predicts how long the next frame will take to send and
+    steps down the quality/scale ladder when that exceeds the target, or back
+    up when there is plenty of headroom.
+    """
+
+    def __init__(self, target_send_time=1.0, levels=None, smoothing=0.3, headroom=0.5):
+        """
+        Parameters:
+            target_send_time (float): Desired seconds per image publish, including acknowledgement.
+            levels (list): [scale, quality] steps ordered from best to cheapest.
+            smoothing (float): Weight of the newest measurement in the moving averages (0-1).
+            headroom (float): Step up only when the prediction is below target * headroom.
+        """
+        self.target_send_time = target_send_time
+        self.levels = [tuple(level) for level in (levels or DEFAULT_LEVELS)]
+        self.smoothing = smoothing
+        self.headroom = headroom
+
+        self.level = 0
+        self.throughput = None   # bytes per second
+        self.ack_latency = 0.0   # seconds
+        self.last_size = None    # bytes at the current level
+        self._lock = threading.Lock()
+
+    def _average(self, current, sample):
+        if current is None:
+            return sample
+        return (1 - self.smoothing) * current + self.smoothing * sample
+
+    def record_publish(self, topic, num_bytes, elapsed, is_image):
+        """
+        Publish listener for mqtt_sender: records one acknowledged publish.
+        """
+        if elapsed <= 0:
+            return
+        with self._lock:
+            if not is_image:
+                self.ack_latency = self._average(self.ack_latency or None, elapsed)
+                return
+            transfer = max(elapsed - self.ack_latency, 1e-3)
+            self.throughput = self._average(self.throughput, num_bytes / transfer)
+            self._adjust()
+
+    def predicted_send_time(self, num_bytes=None):
+        """Seconds the next image is expected to take, or None before any measurement."""
+        num_bytes = num_bytes or self.last_size
+        if self.throughput is None or num_bytes is None:
+            return None
+        return self.ack_latency + num_bytes / self.throughput
+
+    def _adjust(self):
+        predicted = self.predicted_send_time()
+        if predicted is None:
+            return
+        if predicted > self.target_send_time and self.level < len(self.levels) - 1:
+            self.level += 1
+            self.last_size = None  # Size at the new level is unknown until the next frame
+            print(f"[Encoding] Link slow ({predicted:.2f}s predicted), stepping down to scale/quality {self.levels[self.level]}")
+        elif predicted < self.target_send_time * self.headroom and self.level > 0:
+            self.level -= 1
+            self.last_size = None
+            print(f"[Encoding] Link fast ({predicted:.2f}s predicted), stepping up to scale/quality {self.levels[self.level]}")
+
+    def encode(self, frame):
+        """
+        Encodes a frame at the current settings.
+
+        Returns:
+            tuple: (jpeg_bytes, metadata) where metadata describes the chosen settings,
+                   or (None, None) if encoding fails.
+        """
+        with self._lock:
+            scale, quality = self.levels[self.level]
+
+        height, width = frame.shape[:2]
+        if scale < 1.0:
+            frame = cv2.resize(frame, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+
+        jpeg = encode_image_to_jpeg(frame, quality=quality)
+        if not jpeg:
+            return None, None
+
+        with self._lock:
+            self.last_size = len(jpeg)
+            predicted = self.predicted_send_time()
+
+        metadata = {
+            "encoding": {
+                "quality": quality,
+                "scale": scale,
+                "width": frame.shape[1],
+                "height": frame.shape[0],
+                "source_width": width,
+                "source_height": height,
+                "bytes": len(jpeg),
+                "throughput_bps": round(self.throughput) if self.throughput else None,
+                "ack_latency": round(self.ack_latency, 3),
+                "predicted_send_time": round(predicted, 3) if predicted is not None else None,
+            }
+        }
+        return jpeg, metadata
@@ -0,0 +1,56 @@
+# pi-client/utils/envelope.py
+
+import json
+import socket
+import struct
+import time
+import uuid
+
+# Payload layout: MAGIC | 4-byte big-endian header length | JSON header | body
+MAGIC = b"BSC1"
+_LENGTH = struct.Struct(">I")
+
+def pack_message(body, metadata):
+    """
+    Prefixes a message body (e.g. JPEG bytes) with a small JSON metadata header.
+
+    Parameters:
+        body (bytes): Message body.
+        metadata (dict): JSON-serializable metadata.
+
+    Returns:
+        bytes: The enveloped payload.
+    """
+    header = json.dumps(metadata, separators=(',', ':')).encode('utf-8')
+    return MAGIC + _LENGTH.pack(len(header)) + header + body
+
+def unpack_message(payload):
+    """
+    Splits an enveloped payload into (metadata, body).
+
+    Payloads without the envelope (raw JPEG from older clients) are returned as ({}, payload).
+    """
+    if not payload.startswith(MAGIC):
+        return {}, payload
+    start = len(MAGIC) + _LENGTH.size
+    (length,) = _LENGTH.unpack_from(payload, len(MAGIC))
+    metadata = json.loads(payload[start:start + length].decode('utf-8'))
+    return metadata, payload[start + length:]
+
+def new_trace(capture_ts, camera_id=None):
+    """
+    Starts the trace carried in metadata["trace"] from capture to the server's gallery.
+    Timestamps are Unix seconds; later stages add encode_ts, publish_ts and the server-side ones.
+    """
+    return {"id": uuid.uuid4().hex, "camera_id": camera_id or socket.gethostname(), "capture_ts": capture_ts}
+
+def stamp_publish_time(payload):
+    """
+    Sets trace.publish_ts in an enveloped payload to now, just before it goes out
+    (so spooled images report when they were really published). Other payloads are returned unchanged.
+    """
+    metadata, body = unpack_message(payload)
+    if "trace" not in metadata:
+        return payload
+    metadata["trace"]["publish_ts"] = time.time()
+    return pack_message(body, metadata)
@@ -0,0 +1,57 @@
+# pi-client/utils/fake_pantilt.py
+
+import time
+
+class FakePanTilt:
+    """
+    In-memory stand-in for pantilthat.PanTilt.
+
+    Implements the calls PanTiltHelper makes, counts simulated I2C reads and
+    writes, and can add a per-transaction delay so servo code can be exercised
+    and profiled without the HAT attached.
+    """
+
+    def __init__(self, i2c_delay=0.0, **kwargs):
+        """
+        Parameters:
+            i2c_delay (float): Seconds each simulated I2C transaction takes.
+            kwargs: Accepted and ignored, to match the pantilthat.PanTilt signature.
+        """
+        self.i2c_delay = i2c_delay
+        self.pan_angle = 0.0
+        self.tilt_angle = 0.0
+        self.enabled = {1: True, 2: True}
+        self.timeout = kwargs.get('idle_timeout', 2)
+        self.reads = 0
+        self.writes = 0
+
+    def _transaction(self, write):
+        if write:
+            self.writes += 1
+        else:
+            self.reads += 1
+        if self.i2c_delay:
+            time.sleep(self.i2c_delay)
+
+    def pan(self, angle):
+        self._transaction(True)
+        self.pan_angle = float(angle)
+
+    def tilt(self, angle):
+        self._transaction(True)
+        self.tilt_angle = float(angle)
+
+    def get_pan(self):
+        self._transaction(False)
+        return self.pan_angle
+
+    def get_tilt(self):
+        self._transaction(False)
+        return self.tilt_angle
+
+    def servo_enable(self, index, state):
+        self._transaction(True)
+        self.enabled[index] = state
+
+    def idle_timeout(self, seconds):
+        self.timeout = seconds
@@ -0,0 +1,287 @@
+# pi-client/utils/frame_bus.py
+
+import time
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+
+# Header layout (int64): magic, slots, height, width, channels, head sequence
+_MAGIC = 0x42495244  # "BIRD"
+_HEADER_LEN = 8
+_H_MAGIC, _H_SLOTS, _H_HEIGHT, _H_WIDTH, _H_CHANNELS, _H_HEAD = range(6)
+_ALIGN = 64
+
+def _aligned(n):
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class FrameBus:
+    """
+    Single-writer ring buffer of fixed-shape uint8 frames in shared memory.
+
+    One capture process creates the bus and publishes frames into it; any number
+    of reader processes attach by name and read frames in place without copying.
+    Each slot carries a sequence number that the writer invalidates before
+    overwriting, so readers can tell whether a frame they were given is still
+    intact (seqlock style).
+    """
+
+    def __init__(self, name, shape=None, slots=8, create=False):
+        """
+        Parameters:
+            name (str): Shared memory block name.
+            shape (tuple): Frame shape (height, width) or (height, width, channels). Required when creating.
+            slots (int): Number of frames held in the ring. Required when creating.
+            create (bool): Create the block (writer) instead of attaching to an existing one (reader).
+        """
+        self.name = name
+        self.owner = create
+
+        if create:
+            height, width = shape[:2]
+            channels = shape[2] if len(shape) > 2 else 1
+            frame_bytes = height * width * channels
+            size = self._layout(slots, frame_bytes)
+            try:
+                stale = shared_memory.SharedMemory(name=name)
+                stale.close()
+                stale.unlink()
+                print(f"[FrameBus] Removed stale bus '{name}'")
+            except FileNotFoundError:
+                pass
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            self.header = np.ndarray((_HEADER_LEN,), dtype=np.int64, buffer=self.shm.buf)
+            self.header[:] = 0
+            self.header[_H_MAGIC] = _MAGIC
+            self.header[_H_SLOTS] = slots
+            self.header[_H_HEIGHT] = height
+            self.header[_H_WIDTH] = width
+            self.header[_H_CHANNELS] = channels
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            # Readers must not unlink the writer's block when they exit (Python < 3.13 tracker quirk)
+            try:
+                resource_tracker.unregister(self.shm._name, "shared_memory")
+            except Exception:
+                pass
+            self.header = np.ndarray((_HEADER_LEN,), dtype=np.int64, buffer=self.shm.buf)
+            if self.header[_H_MAGIC] != _MAGIC:
+                raise ValueError(f"Shared memory '{name}' is not a frame bus")
+            slots = int(self.header[_H_SLOTS])
+            height, width, channels = (int(self.header[i]) for i in (_H_HEIGHT, _H_WIDTH, _H_CHANNELS))
+            frame_bytes = height * width * channels
+            self._layout(slots, frame_bytes)
+
+        self.slots = slots
+        self.shape = (height, width, channels) if channels > 1 else (height, width)
+        self.slot_table = np.ndarray((slots, 2), dtype=np.int64, buffer=self.shm.buf,
+                                     offset=self._table_offset)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.shm.buf,
+                                 offset=self._data_offset)
+        if create:
+            self.slot_table[:] = -1
+            print(f"[FrameBus] Created '{name}' with {slots} x {self.shape} slots")
+
+    def _layout(self, slots, frame_bytes):
+        self._table_offset = _aligned(_HEADER_LEN * 8)
+        self._data_offset = _aligned(self._table_offset + slots * 2 * 8)
+        return self._data_offset + slots * frame_bytes
+
+    @property
+    def head(self):
+        """Sequence number of the most recently published frame (0 if none yet)."""
+        return int(self.header[_H_HEAD])
+
+    def publish(self, frame, timestamp=None):
+        """
+        Copies a frame into the next slot. Writer only.
+
+        Parameters:
+            frame (numpy.ndarray): uint8 frame matching the bus shape.
+            timestamp (float): Capture time in seconds since the epoch. Defaults to now.
+
+        Returns:
+            int: Sequence number assigned to the frame.
+        """
+        seq = self.head + 1
+        index = seq % self.slots
+        self.slot_table[index, 0] = -1  # Mark slot as being written
+        self.frames[index][...] = frame
+        self.slot_table[index, 1] = int((timestamp or time.time()) * 1e9)
+        self.slot_table[index, 0] = seq
+        self.header[_H_HEAD] = seq
+        return seq
+
+    def is_valid(self, seq):
+        """Returns True if the frame with this sequence number has not been overwritten."""
+        return int(self.slot_table[seq % self.slots, 0]) == seq
+
+    def close(self):
+        """Detaches from the bus, and removes it if this process created it."""
+        self.frames = None
+        self.slot_table = None
+        self.header = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class FrameBusReader:
+    """
+    Per-consumer read cursor over a FrameBus.
+
+    In "latest" mode each read jumps to the newest frame and counts anything
+    skipped as dropped (for live views and motion sampling). In "sequential"
+    mode frames are read in order; if the writer laps the reader, it resumes at
+    the oldest frame still in the ring and counts the lost ones as dropped.
+    """
+
+    def __init__(self, bus, mode="latest", poll_interval=0.002):
+        """
+        Parameters:
+            bus (FrameBus): Attached bus.
+            mode (str): "latest" or "sequential".
+            poll_interval (float): Seconds between checks while waiting for a new frame.
+        """
+        if mode not in ("latest", "sequential"):
+            raise ValueError(f"Unknown frame bus read mode: {mode}")
+        self.bus = bus
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.cursor = bus.head
+        self.dropped = 0
+
+    def read(self, timeout=1.0, wait=True):
+        """
+        Returns the next frame for this reader without copying.
+
+        The returned array is a view into shared memory; call bus.is_valid(seq)
+        after using it, or copy it, if the reader may fall a full ring behind.
+
+        Parameters:
+            timeout (float): Seconds to wait for a new frame.
+            wait (bool): If False, return the current frame even if it was already read.
+
+        Returns:
+            tuple: (seq, timestamp, frame) or None if no frame arrived within the timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            head = self.bus.head
+            if head > self.cursor or (not wait and head > 0):
+                break
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+        if self.mode == "latest" or not wait:
+            seq = head
+        else:
+            seq = self.cursor + 1
+            oldest = head - self.bus.slots + 2  # The slot after head may be mid-write
+            if seq < oldest:
+                seq = max(oldest, 1)
+
+        if seq > self.cursor + 1:
+            self.dropped += seq - self.cursor - 1
+        self.cursor = max(self.cursor, seq)
+
+        index = seq % self.bus.slots
+        timestamp = self.bus.slot_table[index, 1] / 1e9
+        frame = self.bus.frames[index]
+        if not self.bus.is_valid(seq):
+            # Overwritten between the head check and here; retry on the next frame
+            return self.read(max(0.0, deadline - time.monotonic()), wait)
+        return seq, timestamp, frame
+
+
+class BusCamera:
+    """
+    Camera stand-in that reads from the capture service's frame buses.
+
+    Exposes the parts of the Picamera2 and PiCameraCapture interfaces used by
+    the motion loop, MotionDetector and the Flask stream, so each consumer can
+    attach its own BusCamera (and therefore its own read cursors) to one shared
+    camera.
+    """
+
+    def __init__(self, main_name="birdscope_main", lores_name="birdscope_lores", mode="latest", timeout=2.0):
+        """
+        Parameters:
+            main_name (str): Name of the main-stream bus.
+            lores_name (str): Name of the lores luma bus.
+            mode (str): Read mode for both cursors ("latest" or "sequential").
+            timeout (float): Seconds to wait for a frame before giving up.
+        """
+        self.main_bus = FrameBus(main_name)
+        self.lores_bus = FrameBus(lores_name)
+        self.main_reader = FrameBusReader(self.main_bus, mode)
+        self.lores_reader = FrameBusReader(self.lores_bus, mode)
+        self.timeout = timeout
+        self.camera = self  # PiCameraCapture compatibility
+        self.resolution = (self.main_bus.shape[1], self.main_bus.shape[0])
+        self.lores_size = (self.lores_bus.shape[1], self.lores_bus.shape[0])
+        print(f"[FrameBus] Attached to '{main_name}' {self.resolution} and '{lores_name}' {self.lores_size}")
+
+    def capture_array(self, name="main"):
+        """
+        Returns the next frame of the named stream as a zero-copy view ("main" or "lores").
+
+        Raises:
+            TimeoutError: If the capture service has not published a frame within the timeout.
+        """
+        reader = self.lores_reader if name == "lores" else self.main_reader
+        item = reader.read(self.timeout)
+        if item is None:
+            raise TimeoutError(f"No frame on bus '{reader.bus.name}' within {self.timeout}s")
+        return item[2]
+
+    def capture_frame(self):
+        """PiCameraCapture-compatible main frame capture (already flipped by the capture service)."""
+        try:
+            return self.capture_array("main")
+        except Exception as e:
+            print(f"Error capturing frame from bus: {e}")
+            return None
+
+    def capture_luma(self):
+        """PiCameraCapture-compatible lores luma capture."""
+        try:
+            return self.capture_array("lores")
+        except Exception as e:
+            print(f"Error capturing lores frame from bus: {e}")
+            return None
+
+    def capture_streams(self):
+        """
+        PiCameraCapture-compatible (frame, luma) capture.
+
+        Unlike the other capture calls these are copies, since callers may hold
+        on to them (e.g. in a pre-trigger buffer) for longer than a ring lap.
+        """
+        luma = self.capture_luma()
+        frame = self.capture_frame()
+        if frame is None or luma is None:
+            return None, None
+        return frame.copy(), luma.copy()
+
+    def capture_still(self):
+        """
+        The capture service owns the camera mode, so a bus consumer cannot switch
+        to full-sensor stills; returns a copy of the latest main frame instead.
+        """
+        frame = self.capture_frame()
+        return frame.copy() if frame is not None else None
+
+    def dropped(self):
+        """Returns (main, lores) frames this consumer skipped."""
+        return self.main_reader.dropped, self.lores_reader.dropped
+
+    def stop(self):
+        self.main_bus.close()
+        self.lores_bus.close()
+
+    def close(self):
+        self.stop()
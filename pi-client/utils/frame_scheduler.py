@@ -0,0 +1,138 @@
+# pi-client/utils/frame_scheduler.py
+
+import time
+from datetime import datetime
+
+class AdaptiveScheduler:
+    """
+    Chooses how long to wait between motion samples.
+
+    Samples at the active rate while there is motion, backs off gradually to an
+    idle rate after a quiet period, and optionally drops to a night rate outside
+    configured daylight hours. Any rise in motion score snaps straight back to
+    the active rate. Sampling rate, CPU use and trigger latency are logged
+    periodically so power versus responsiveness can be tuned.
+    """
+
+    def __init__(self, active_interval=0.2, idle_interval=1.0, night_interval=5.0,
+                 quiet_period=60, backoff=1.5, rise_ratio=0.5,
+                 active_hours=None, log_interval=60):
+        """
+        Parameters:
+            active_interval (float): Seconds between samples while motion is present.
+            idle_interval (float): Longest interval between samples during the day.
+            night_interval (float): Interval used outside active_hours.
+            quiet_period (float): Seconds without rising motion before backing off.
+            backoff (float): Factor the interval grows by per sample once quiet.
+            rise_ratio (float): Fraction of the motion threshold that counts as "rising" motion.
+            active_hours (list): Optional ["HH:MM", "HH:MM"] daylight window in local time.
+            log_interval (float): Seconds between statistics log lines (0 disables logging).
+        """
+        self.active_interval = active_interval
+        self.idle_interval = idle_interval
+        self.night_interval = night_interval
+        self.quiet_period = quiet_period
+        self.backoff = backoff
+        self.rise_ratio = rise_ratio
+        self.active_hours = self._parse_hours(active_hours)
+        self.log_interval = log_interval
+
+        now = time.monotonic()
+        self.interval = active_interval
+        self.mode = "active"
+        self.last_activity = now
+        self.last_sample = None
+        self.tick_start = now
+
+        self._reset_stats(now)
+
+    @staticmethod
+    def _parse_hours(active_hours):
+        if not active_hours:
+            return None
+        start, end = (datetime.strptime(t, "%H:%M").time() for t in active_hours)
+        return start, end
+
+    def _reset_stats(self, now):
+        self.stats_start = now
+        self.stats_cpu_start = time.process_time()
+        self.samples = 0
+        self.triggers = 0
+        self.trigger_latencies = []
+
+    def is_daylight(self):
+        """Returns True if the current local time is within active_hours (always True if unset)."""
+        if self.active_hours is None:
+            return True
+        start, end = self.active_hours
+        now = datetime.now().time()
+        if start <= end:
+            return start <= now <= end
+        return now >= start or now <= end  # Window wraps past midnight
+
+    def start_tick(self):
+        """Marks the start of a sample so wait() can subtract processing time."""
+        self.tick_start = time.monotonic()
+
+    def update(self, level, triggered=False):
+        """
+        Records a sample and picks the next interval.
+
+        Parameters:
+            level (float): Motion score of the latest sample as a fraction of the trigger threshold.
+            triggered (bool): Whether this sample triggered motion.
+
+        Returns:
+            float: Seconds until the next sample should start.
+        """
+        now = time.monotonic()
+        self.samples += 1
+
+        if triggered:
+            self.triggers += 1
+            # A trigger could have started at any point since the previous sample
+            if self.last_sample is not None:
+                self.trigger_latencies.append(now - self.last_sample)
+        self.last_sample = now
+
+        if triggered or level >= self.rise_ratio:
+            self.last_activity = now
+            self.interval = self.active_interval
+            self.mode = "active"
+        elif not self.is_daylight():
+            self.interval = self.night_interval
+            self.mode = "night"
+        elif now - self.last_activity >= self.quiet_period:
+            self.interval = min(self.idle_interval, self.interval * self.backoff)
+            self.mode = "idle"
+        else:
+            self.interval = self.active_interval
+            self.mode = "active"
+
+        if self.log_interval and now - self.stats_start >= self.log_interval:
+            self.log_stats(now)
+
+        return self.interval
+
+    def wait(self):
+        """Sleeps for the remainder of the current interval."""
+        elapsed = time.monotonic() - self.tick_start
+        remaining = self.interval - elapsed
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def log_stats(self, now=None):
+        """Prints sampling rate, CPU use and trigger latency since the last log line."""
+        now = now or time.monotonic()
+        wall = now - self.stats_start
+        if wall <= 0:
+            return
+        cpu = time.process_time() - self.stats_cpu_start
+        rate = self.samples / wall
+        line = (f"[Scheduler] mode={self.mode} interval={self.interval:.2f}s "
+                f"rate={rate:.2f} fps cpu={100 * cpu / wall:.1f}% triggers={self.triggers}")
+        if self.trigger_latencies:
+            avg_latency = sum(self.trigger_latencies) / len(self.trigger_latencies)
+            line += f" latency avg={avg_latency:.2f}s max={max(self.trigger_latencies):.2f}s"
+        print(line)
+        self._reset_stats(now)
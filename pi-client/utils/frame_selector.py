@@ -0,0 +1,107 @@
+# pi-client/utils/frame_selector.py
+
+import time
+from collections import deque
+import cv2
+
+class PreTriggerBuffer:
+    """
+    Rolling buffer of the most recent frames and their motion boxes.
+
+    Lets the motion loop consider frames from just before a trigger, when the
+    bird was often still and in view, instead of only frames captured after it.
+    """
+
+    def __init__(self, max_frames=8):
+        """
+        Parameters:
+            max_frames (int): Number of recent frames to keep.
+        """
+        self.frames = deque(maxlen=max_frames)
+
+    def append(self, frame, box=None, timestamp=None):
+        """
+        Adds a frame (which must not be reused by the caller) with its motion box in frame coordinates.
+        """
+        self.frames.append({"timestamp": timestamp or time.time(), "frame": frame, "box": box})
+
+    def drain(self, max_age=None):
+        """
+        Returns and clears the buffered frames, oldest first.
+
+        Parameters:
+            max_age (float): If set, frames older than this many seconds are discarded.
+        """
+        items = list(self.frames)
+        self.frames.clear()
+        if max_age is not None:
+            cutoff = time.time() - max_age
+            items = [item for item in items if item["timestamp"] >= cutoff]
+        return items
+
+
+def sharpness(frame, box=None, max_side=160):
+    """
+    Variance of the Laplacian over a frame region, a cheap focus/motion-blur measure.
+
+    Parameters:
+        frame (numpy.ndarray): RGB/BGR or grayscale frame.
+        box (list): Optional [x1, y1, x2, y2] region to measure.
+        max_side (int): Regions are downscaled to at most this size before measuring.
+
+    Returns:
+        float: Sharpness score (higher is sharper).
+    """
+    if box is not None:
+        x1, y1, x2, y2 = box
+        frame = frame[max(0, y1):y2, max(0, x1):x2]
+    if frame.size == 0:
+        return 0.0
+    # Green channel stands in for luma; avoids a colour conversion
+    gray = frame[:, :, 1] if frame.ndim == 3 else frame
+    scale = max_side / max(gray.shape[:2])
+    if scale < 1:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    _, stddev = cv2.meanStdDev(cv2.Laplacian(gray, cv2.CV_16S))
+    return float(stddev[0][0] ** 2)
+
+
+def box_overlap(box, reference):
+    """
+    Intersection-over-union of two [x1, y1, x2, y2] boxes (0 if either is None).
+    """
+    if box is None or reference is None:
+        return 0.0
+    ix1, iy1 = max(box[0], reference[0]), max(box[1], reference[1])
+    ix2, iy2 = min(box[2], reference[2]), min(box[3], reference[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    area = (box[2] - box[0]) * (box[3] - box[1]) + (reference[2] - reference[0]) * (reference[3] - reference[1]) - inter
+    return inter / area if area > 0 else 0.0
+
+
+def select_best_frames(candidates, reference_box=None, top_k=1):
+    """
+    Ranks candidate frames by sharpness inside their motion box and overlap with the trigger box.
+
+    Frames with no motion box are measured over the whole frame and ranked below
+    frames whose motion lines up with the trigger.
+
+    Parameters:
+        candidates (list): Dicts with "frame" and optional "box" and "timestamp".
+        reference_box (list): Motion box of the triggering sample, in frame coordinates.
+        top_k (int): Number of frames to return.
+
+    Returns:
+        list: The top_k candidates, best first, each with an added "rank_score".
+    """
+    for candidate in candidates:
+        box = candidate.get("box")
+        score = sharpness(candidate["frame"], box)
+        if box is None:
+            score *= 0.5
+        elif reference_box is not None:
+            score *= 0.5 + 0.5 * box_overlap(box, reference_box)
+        candidate["rank_score"] = score
+
+    ranked = sorted(candidates, key=lambda c: c["rank_score"], reverse=True)
+    return ranked[:top_k]
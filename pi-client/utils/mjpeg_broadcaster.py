@@ -0,0 +1,108 @@
+# pi-client/utils/mjpeg_broadcaster.py
+
+import threading
+import time
+import cv2
+
+class MjpegBroadcaster:
+    """
+    Encodes camera frames to JPEG once and fans the same bytes out to every viewer.
+
+    A single encoder thread runs only while at least one viewer is connected.
+    Viewers never block the encoder: each one waits for the next encoded frame,
+    takes whatever is newest (latest-frame-wins) and is throttled to its own
+    frame-rate cap, so a slow browser simply sees fewer frames.
+    """
+
+    def __init__(self, camera, max_fps=15, quality=80):
+        """
+        Parameters:
+            camera: Object with capture_array() (Picamera2 or BusCamera).
+            max_fps (float): Upper bound on the encoder frame rate.
+            quality (int): JPEG quality for the live view.
+        """
+        self.camera = camera
+        self.max_fps = max_fps
+        self.quality = quality
+
+        self._condition = threading.Condition()
+        self._jpeg = None
+        self._seq = 0
+        self._viewers = 0
+        self._thread = None
+
+    def viewer_count(self):
+        with self._condition:
+            return self._viewers
+
+    def _add_viewer(self):
+        with self._condition:
+            self._viewers += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+                print("[Stream] Encoder started")
+
+    def _remove_viewer(self):
+        with self._condition:
+            self._viewers -= 1
+
+    def _run(self):
+        interval = 1.0 / self.max_fps
+        encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), self.quality]
+        while True:
+            with self._condition:
+                if self._viewers <= 0:
+                    self._thread = None
+                    self._jpeg = None
+                    print("[Stream] No viewers, encoder idle")
+                    return
+
+            start = time.monotonic()
+            try:
+                frame = self.camera.capture_array()
+                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                ok, buffer = cv2.imencode('.jpg', frame_rgb, encode_param)
+            except Exception as e:
+                print(f"Error in camera streaming: {e}")
+                time.sleep(1)
+                continue
+
+            if ok:
+                with self._condition:
+                    self._jpeg = buffer.tobytes()
+                    self._seq += 1
+                    self._condition.notify_all()
+
+            remaining = interval - (time.monotonic() - start)
+            if remaining > 0:
+                time.sleep(remaining)
+
+    def stream(self, max_fps=None):
+        """
+        Generator yielding multipart MJPEG chunks for one viewer.
+
+        Parameters:
+            max_fps (float): Optional per-viewer frame-rate cap (defaults to the encoder rate).
+        """
+        min_interval = 1.0 / max_fps if max_fps else 0
+        last_seq = 0
+        last_sent = 0.0
+        self._add_viewer()
+        try:
+            while True:
+                wait = min_interval - (time.monotonic() - last_sent)
+                if wait > 0:
+                    time.sleep(wait)
+
+                with self._condition:
+                    if not self._condition.wait_for(lambda: self._seq != last_seq and self._jpeg is not None, timeout=5):
+                        continue
+                    jpeg = self._jpeg
+                    last_seq = self._seq
+
+                last_sent = time.monotonic()
+                yield (b'--frame\r\n'
+                    b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
+        finally:
+            self._remove_viewer()
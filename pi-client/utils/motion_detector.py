@@ -1,33 +1,176 @@
 #!/usr/bin/env python3
 import cv2
 import numpy as np
-from picamera2 import Picamera2
-from libcamera import Transform
+import threading
 import time
+from utils.motion_zones import MotionZones, union_box
 
 class MotionDetector:
-    def __init__(self, picam2, threshold=5000, sleep_time=0.2):
+    """
+    Detects motion on the camera's low-resolution (lores) YUV stream.
+
+    The luma (Y) plane of the lores stream is already a grayscale image, so no
+    colour conversion or full-size blur is needed. Each frame is compared
+    against a running-average background model rather than the previous frame,
+    which lets slow lighting changes fade into the background instead of
+    triggering.
+
+    One detector may be shared by the motion loop, auto-track and the web UI's
+    motion test; analyze() and reset() are serialized so the background model
+    is never updated from two threads at once.
+    """
+
+    def __init__(self, picam2, threshold=1250, sleep_time=0.2,
+                 alpha=0.05, pixel_threshold=25, min_blob_area=50,
+                 lores_size=(320, 240), zones=None, profile=False):
+        """
+        Parameters:
+            picam2 (Picamera2): Started camera, ideally configured with a YUV420 lores stream.
+            threshold (int): Number of changed lores pixels needed to report motion (default for zones).
+            sleep_time (float): Seconds to sleep after each detection call.
+            alpha (float): Background learning rate (0-1). Higher adapts faster to lighting changes.
+            pixel_threshold (int): Per-pixel luma difference counted as change.
+            min_blob_area (int): Minimum contour area (lores pixels) reported as a bounding box.
+            lores_size (tuple): Expected (width, height) of the lores stream.
+            zones (MotionZones): Optional trigger zones and exclusion masks. Whole frame if None.
+            profile (bool): Accumulate wall and CPU seconds per stage in stage_times (used by bench_motion.py).
+        """
         self.picam2 = picam2
-        self.prev_gray = None
         self.threshold = threshold
         self.sleep_time = sleep_time
+        self.alpha = alpha
+        self.pixel_threshold = pixel_threshold
+        self.min_blob_area = min_blob_area
+        self.lores_size = lores_size
+        self.zones = zones or MotionZones()
+        self.background = None
+        self.frame_size = None
+        self._kernel = np.ones((3, 3), np.uint8)
+        self.profile = profile
+        self.stage_times = {"blur": [0.0, 0.0], "diff": [0.0, 0.0]}  # stage -> [wall, cpu] seconds
+        self._lock = threading.Lock()
 
-    def detect_motion(self):
-        frame = self.picam2.capture_array()
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        gray = cv2.GaussianBlur(gray, (21, 21), 0)
+    def _record(self, stage, wall_start, cpu_start):
+        times = self.stage_times[stage]
+        times[0] += time.perf_counter() - wall_start
+        times[1] += time.thread_time() - cpu_start
+
+    def reset(self):
+        """
+        Discards the background model, e.g. after the camera has moved.
+        The next frame becomes the new background.
+        """
+        with self._lock:
+            self.background = None
+
+    def read_luma(self):
+        """
+        Returns the luma plane of the latest lores frame as a 2D uint8 array.
+
+        Falls back to a subsampled green channel of the main stream if the
+        camera was configured without a lores stream.
+        """
+        try:
+            yuv = self.picam2.capture_array("lores")
+            width, height = self.lores_size
+            return yuv[:height, :width]
+        except Exception:
+            frame = self.picam2.capture_array()
+            # Green carries most of the luminance; taking it directly is far cheaper than cvtColor.
+            return frame[::2, ::2, 1]
+
+    def analyze(self, luma=None, learn=True):
+        """
+        Compares a luma frame against the background model.
+
+        Parameters:
+            luma (numpy.ndarray): Optional pre-captured luma plane. Captured from the camera if None.
+            learn (bool): Update the background model with this frame. Pass False for extra frames
+                          (e.g. a post-trigger burst) so the model keeps learning at the sampling rate.
+
+        Returns:
+            dict: {"motion": bool, "score": int, "level": float, "zone": str,
+                   "boxes": [[x1, y1, x2, y2], ...], "box": [x1, y1, x2, y2],
+                   "frame_size": (width, height)} with boxes in luma pixel coordinates.
+                  "level" is the strongest zone score as a fraction of its threshold and
+                  "zone" names the zone that fired. Once a background exists, "mask" holds
+                  the binary change mask (exclusions removed) and "zones" the per-zone results.
+        """
+        if luma is None:
+            luma = self.read_luma()
+        with self._lock:
+            return self._analyze(luma, learn)
+
+    def _analyze(self, luma, learn):
+        if self.profile:
+            wall_start, cpu_start = time.perf_counter(), time.thread_time()
 
-        motion = False
-        if self.prev_gray is not None:
-            delta = cv2.absdiff(self.prev_gray, gray)
-            thresh = cv2.threshold(delta, 25, 255, cv2.THRESH_BINARY)[1]
-            motion_score = cv2.countNonZero(thresh)
+        # A cheap 5x5 box filter on the small luma plane suppresses sensor noise.
+        gray = cv2.blur(luma, (5, 5))
+        if self.profile:
+            self._record("blur", wall_start, cpu_start)
+            wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        self.frame_size = (gray.shape[1], gray.shape[0])
 
-            if motion_score > self.threshold:
-                print(f"[Motion] Triggered! Score: {motion_score}")
-                motion = True
+        result = {"motion": False, "score": 0, "level": 0.0, "zone": None,
+                  "boxes": [], "box": None, "frame_size": self.frame_size}
 
-        self.prev_gray = gray
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray.astype(np.float32)
+            if self.profile:
+                self._record("diff", wall_start, cpu_start)
+            return result
+
+        # Remove a global exposure shift before differencing so clouds and auto-exposure don't trigger.
+        shift = cv2.mean(gray)[0] - cv2.mean(self.background)[0]
+        background = np.clip(self.background + shift, 0, 255).astype(np.uint8)
+
+        delta = cv2.absdiff(background, gray)
+        mask = cv2.threshold(delta, self.pixel_threshold, 255, cv2.THRESH_BINARY)[1]
+        mask = cv2.dilate(mask, self._kernel, iterations=2)
+
+        mask, hits = self.zones.apply(mask, self.threshold, self.min_blob_area)
+        fired = [hit for hit in hits if hit["triggered"]]
+
+        result["score"] = cv2.countNonZero(mask)
+        result["level"] = max(hit["level"] for hit in hits)
+        result["mask"] = mask
+        result["zones"] = hits
+        if fired:
+            strongest = max(fired, key=lambda hit: hit["level"])
+            result["motion"] = True
+            result["zone"] = strongest["zone"]
+            result["boxes"] = [box for hit in fired for box in hit["boxes"]]
+            result["box"] = union_box(result["boxes"])
+
+        # Frames with motion are learned at a tenth of the rate, so a perched bird fades out only slowly.
+        if learn:
+            rate = self.alpha if not result["motion"] else self.alpha * 0.1
+            cv2.accumulateWeighted(gray, self.background, rate)
+        if self.profile:
+            self._record("diff", wall_start, cpu_start)
+
+        if result["motion"]:
+            print(f"[Motion] Triggered in zone '{result['zone']}'! Score: {result['score']}, box: {result['box']}")
+        return result
+
+    def detect_motion(self):
+        """
+        Runs one detection step and sleeps for sleep_time.
+
+        Returns:
+            bool: True if motion was detected.
+        """
+        result = self.analyze()
         time.sleep(self.sleep_time)
-        return motion
+        return result["motion"]
+
 
+def scale_box(box, from_size, to_size):
+    """
+    Scales an [x1, y1, x2, y2] box between two (width, height) frame sizes.
+    """
+    sx = to_size[0] / from_size[0]
+    sy = to_size[1] / from_size[1]
+    x1, y1, x2, y2 = box
+    return [int(x1 * sx), int(y1 * sy), int(x2 * sx), int(y2 * sy)]
@@ -0,0 +1,119 @@
+# pi-client/utils/motion_zones.py
+
+import cv2
+import numpy as np
+
+class MotionZones:
+    """
+    Polygon trigger zones and exclusion masks for MotionDetector.
+
+    Polygons are given in normalized (0-1) frame coordinates so the same config
+    works at any stream resolution. Masks are rasterized once per frame size and
+    then applied to the change mask with vectorized bitwise ops. Each zone has
+    its own pixel threshold and minimum blob size.
+    """
+
+    def __init__(self, zones=None, exclusions=None):
+        """
+        Parameters:
+            zones (list): Dicts with "name", "polygon" ([[x, y], ...] in 0-1 coords),
+                          and optional "threshold" (changed pixels) and "min_blob_area" (pixels).
+                          If empty, the whole frame is one zone named "frame".
+            exclusions (list): Polygons ([[x, y], ...] in 0-1 coords) whose motion is ignored.
+        """
+        self.zones = zones or []
+        self.exclusions = exclusions or []
+        self._size = None
+        self._keep_mask = None
+        self._zone_masks = []
+
+    @classmethod
+    def from_config(cls, motion_config):
+        """
+        Builds zones from the "motion" section of config.yaml, or returns None if none are configured.
+        """
+        zones = motion_config.get('zones')
+        exclusions = motion_config.get('exclusions')
+        if not zones and not exclusions:
+            return None
+        return cls(zones, exclusions)
+
+    @staticmethod
+    def _rasterize(polygon, size):
+        width, height = size
+        points = np.array([[x * (width - 1), y * (height - 1)] for x, y in polygon], dtype=np.int32)
+        mask = np.zeros((height, width), dtype=np.uint8)
+        cv2.fillPoly(mask, [points], 255)
+        return mask
+
+    def _build(self, size):
+        """Rasterizes all polygons for a (width, height) frame size."""
+        width, height = size
+        keep = np.full((height, width), 255, dtype=np.uint8)
+        for polygon in self.exclusions:
+            keep = cv2.bitwise_and(keep, cv2.bitwise_not(self._rasterize(polygon, size)))
+
+        self._zone_masks = []
+        for index, zone in enumerate(self.zones):
+            zone_mask = cv2.bitwise_and(self._rasterize(zone['polygon'], size), keep)
+            self._zone_masks.append((zone.get('name', f"zone_{index}"), zone_mask,
+                                     zone.get('threshold'), zone.get('min_blob_area')))
+
+        self._keep_mask = keep
+        self._size = size
+        print(f"[Zones] Built {len(self._zone_masks)} zone mask(s) and {len(self.exclusions)} exclusion(s) at {width}x{height}")
+
+    def apply(self, mask, default_threshold, default_min_blob_area):
+        """
+        Removes excluded areas from a binary change mask and evaluates each zone.
+
+        Parameters:
+            mask (numpy.ndarray): Binary (0/255) change mask.
+            default_threshold (int): Threshold for zones without their own.
+            default_min_blob_area (int): Minimum blob area for zones without their own.
+
+        Returns:
+            tuple: (filtered_mask, hits) where hits is a list of
+                   {"zone", "score", "level", "boxes", "box", "triggered"} dicts, one per zone.
+        """
+        size = (mask.shape[1], mask.shape[0])
+        if size != self._size:
+            self._build(size)
+
+        mask = cv2.bitwise_and(mask, self._keep_mask)
+        zone_masks = self._zone_masks or [("frame", self._keep_mask, None, None)]
+
+        hits = []
+        for name, zone_mask, threshold, min_blob_area in zone_masks:
+            threshold = threshold if threshold is not None else default_threshold
+            min_blob_area = min_blob_area if min_blob_area is not None else default_min_blob_area
+
+            zone_motion = cv2.bitwise_and(mask, zone_mask)
+            score = cv2.countNonZero(zone_motion)
+            hit = {"zone": name, "score": score, "level": score / threshold if threshold else 0.0,
+                   "boxes": [], "box": None, "triggered": False}
+
+            # Only pay for contour extraction when the zone's pixel count is already over threshold
+            if score > threshold:
+                contours, _ = cv2.findContours(zone_motion, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+                for contour in contours:
+                    if cv2.contourArea(contour) < min_blob_area:
+                        continue
+                    x, y, w, h = cv2.boundingRect(contour)
+                    hit["boxes"].append([x, y, x + w, y + h])
+                if hit["boxes"]:
+                    hit["triggered"] = True
+                    hit["box"] = union_box(hit["boxes"])
+            hits.append(hit)
+
+        return mask, hits
+
+
+def union_box(boxes):
+    """
+    Returns the [x1, y1, x2, y2] box enclosing all given boxes, or None if there are none.
+    """
+    if not boxes:
+        return None
+    return [min(b[0] for b in boxes), min(b[1] for b in boxes),
+            max(b[2] for b in boxes), max(b[3] for b in boxes)]
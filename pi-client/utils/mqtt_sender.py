@@ -1,42 +1,291 @@
 import os
 import time
-import yaml
+import uuid
+import queue
+import threading
 import paho.mqtt.client as mqtt
 from dotenv import load_dotenv
 
+from utils.config import load_config
+from utils.spool import DiskSpool
+from utils.envelope import pack_message, stamp_publish_time
+
 # === Load sensitive credentials from .env ===
 load_dotenv()
 MQTT_USERNAME = os.getenv("MQTT_USERNAME")
 MQTT_PASSWORD = os.getenv("MQTT_PASSWORD")
 
 # === Load connection and topic config from config.yaml ===
-CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', 'config.yaml')
-
-with open(CONFIG_PATH, 'r') as f:
-    config = yaml.safe_load(f)
+config = load_config()
 
 BROKER = config.get('broker', 'localhost')
 PORT = config.get('port', 1883)
 IMAGE_TOPIC = config.get('image_topic', 'birdwatcher/image')
 STATUS_TOPIC = config.get('status_topic', 'birdwatcher/status')
+CHUNK_TOPIC = config.get('chunk_topic', IMAGE_TOPIC + '/chunk')
+CHUNK_SIZE = config.get('chunk_kb', 256) * 1024  # Payloads above this are split into sequenced chunks
+
+# === Offline spool settings ===
+SPOOL_CONFIG = config.get('spool', {})
+SPOOL_DIR = SPOOL_CONFIG.get('dir', os.path.join(os.path.dirname(__file__), '..', 'spool'))
+DRAIN_RATE = SPOOL_CONFIG.get('drain_rate', 2.0)        # Max spooled messages per second
+PUBLISH_TIMEOUT = SPOOL_CONFIG.get('publish_timeout', 10)
+
+spool = DiskSpool(SPOOL_DIR,
+                  max_files=SPOOL_CONFIG.get('max_files', 500),
+                  max_bytes=SPOOL_CONFIG.get('max_mb', 200) * 1024 * 1024)
+
+# === Lazily connected MQTT client ===
+OUTBOX_SIZE = SPOOL_CONFIG.get('outbox_size', 16)  # Messages waiting for the sender thread before images spill to disk
+_IMAGE, _STATUS = "image", "status"
+
+_client = None
+_client_lock = threading.Lock()
+_connected = threading.Event()
+_outbox = queue.Queue(maxsize=OUTBOX_SIZE)  # (kind, payload) handed over by send_image / send_status
+_acked = set()  # mids acknowledged by the broker and not yet claimed by _wait_for_ack
+_ack_condition = threading.Condition()
+_stats = {"drained": 0, "drain_started": None, "drain_rate": 0.0, "disconnects": 0}
+_publish_listeners = []
+
+def add_publish_listener(callback):
+    """
+    Registers callback(topic, num_bytes, elapsed, is_image), called after every
+    acknowledged publish with the time from publish to broker acknowledgement.
+    """
+    _publish_listeners.append(callback)
+
+def _wake():
+    try:
+        _outbox.put_nowait((None, None))
+    except queue.Full:
+        pass  # The sender thread has work queued anyway
+
+def _on_connect(client, userdata, flags, rc):
+    if rc == 0:
+        print(f"[MQTT] Connected to {BROKER}:{PORT}")
+        _connected.set()
+        _wake()
+    else:
+        print(f"[MQTT] Connection failed with code {rc}")
+
+def _on_disconnect(client, userdata, rc):
+    _connected.clear()
+    _stats["disconnects"] += 1  # Lets publishes tell an outage apart from a slow link
+    print(f"[MQTT] Disconnected (code {rc}), spooling images until the link returns")
+
+def _on_publish(client, userdata, mid):
+    with _ack_condition:
+        _acked.add(mid)
+        _ack_condition.notify_all()
+
+def _get_client():
+    """
+    Creates the client on first use and connects in the background.
+    Never blocks on the broker; paho keeps retrying the connection.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            client = mqtt.Client()
+            if MQTT_USERNAME and MQTT_PASSWORD:
+                client.username_pw_set(MQTT_USERNAME, MQTT_PASSWORD)
+            client.on_connect = _on_connect
+            client.on_disconnect = _on_disconnect
+            client.on_publish = _on_publish
+            client.reconnect_delay_set(min_delay=1, max_delay=60)
+            client.connect_async(BROKER, PORT)
+            client.loop_start()  # Run network loop (and reconnects) in background
+            threading.Thread(target=_sender_loop, daemon=True).start()
+            _client = client
+        return _client
 
-# === Initialize MQTT Client ===
-client = mqtt.Client()
-if MQTT_USERNAME and MQTT_PASSWORD:
-    client.username_pw_set(MQTT_USERNAME, MQTT_PASSWORD)
+def _wait_for_ack(mid):
+    """
+    Blocks until the broker acknowledges `mid`. paho keeps retrying a QoS 1 message
+    it has accepted, across reconnects, so this never gives up: spooling the message
+    as well would deliver it twice.
+    """
+    start = time.monotonic()
+    with _ack_condition:
+        while mid not in _acked:
+            if not _ack_condition.wait(timeout=PUBLISH_TIMEOUT):
+                print(f"[MQTT] Message {mid} still unacknowledged after {time.monotonic() - start:.0f}s, "
+                      f"paho is retrying it")
+        _acked.discard(mid)
 
-client.connect(BROKER, PORT)
-client.loop_start()  # Run network loop in background
+def _publish(topic, payload, qos=1, notify=True):
+    """
+    Hands a message to paho and waits for the broker acknowledgement.
+    Only called from the sender thread.
+
+    Returns:
+        bool: True once acknowledged, False if the link is down and paho did not take the message.
+    """
+    client = _get_client()
+    if not _connected.is_set():
+        return False
+    start = time.monotonic()
+    disconnects = _stats["disconnects"]
+    try:
+        info = client.publish(topic, payload, qos=qos)
+    except Exception as e:
+        print(f"[MQTT] Publish error: {e}")
+        return False
+    # NO_CONN means the link dropped just now; paho still queued the message and sends it on reconnect
+    if info.rc not in (mqtt.MQTT_ERR_SUCCESS, mqtt.MQTT_ERR_NO_CONN):
+        return False
+    _wait_for_ack(info.mid)
+    elapsed = time.monotonic() - start
+    # An acknowledgement that waited out an outage says nothing about link speed;
+    # a slow one on a link that stayed up is exactly what the encoder needs to see
+    outage = info.rc == mqtt.MQTT_ERR_NO_CONN or _stats["disconnects"] != disconnects
+    if notify and not outage:
+        for listener in _publish_listeners:
+            listener(topic, len(payload), elapsed, topic == IMAGE_TOPIC)
+    return True
+
+def _send_payload(payload):
+    """
+    Publishes an image payload, splitting it into sequenced chunks on CHUNK_TOPIC
+    when it is larger than CHUNK_SIZE. Each chunk is acknowledged before the next
+    is sent, so no single publish holds the link for long.
+
+    Returns:
+        bool: True if every part was acknowledged.
+    """
+    payload = stamp_publish_time(payload)
+    if len(payload) <= CHUNK_SIZE:
+        return _publish(IMAGE_TOPIC, payload)
+
+    transfer_id = uuid.uuid4().hex
+    count = (len(payload) + CHUNK_SIZE - 1) // CHUNK_SIZE
+    start = time.monotonic()
+    disconnects = _stats["disconnects"]
+    for index in range(count):
+        chunk = payload[index * CHUNK_SIZE:(index + 1) * CHUNK_SIZE]
+        header = {"transfer_id": transfer_id, "index": index, "count": count, "total_size": len(payload)}
+        if not _publish(CHUNK_TOPIC, pack_message(chunk, header), notify=False):
+            print(f"[MQTT] Chunked transfer {transfer_id[:8]} interrupted at chunk {index + 1}/{count}")
+            return False
+    elapsed = time.monotonic() - start
+    # Report the whole transfer as one image publish so throughput estimates stay comparable
+    if _stats["disconnects"] == disconnects:
+        for listener in _publish_listeners:
+            listener(IMAGE_TOPIC, len(payload), elapsed, True)
+    print(f"[MQTT] Sent {len(payload)} bytes in {count} chunks")
+    return True
+
+def _send_image(payload):
+    """Sends a live image unless older ones are spooled (to keep ordering) or the link is down; spools it otherwise."""
+    if spool.depth() == 0 and _send_payload(payload):
+        print(f"[MQTT] Image published to topic '{IMAGE_TOPIC}' ({len(payload)} bytes)")
+        return
+    spool.put(payload)
+    print(f"[MQTT] Broker unavailable, image spooled ({len(payload)} bytes, depth {spool.depth()})")
+
+def _drain_one():
+    """Sends the oldest spooled image. Returns True if it went out."""
+    batch = spool.peek(1)
+    if not batch:
+        _stats["drain_started"] = None
+        return False
+    if _stats["drain_started"] is None:
+        _stats["drain_started"] = time.monotonic()
+        _stats["drained"] = 0
+        print(f"[MQTT] Draining spool ({spool.depth()} queued)")
+
+    path, payload = batch[0]
+    if not _send_payload(payload):
+        return False
+    spool.remove(path)
+    _stats["drained"] += 1
+    elapsed = time.monotonic() - _stats["drain_started"]
+    _stats["drain_rate"] = _stats["drained"] / elapsed if elapsed > 0 else 0.0
+    return True
+
+def _sender_loop():
+    """
+    Does all publishing, so the capture loop never waits on the broker. Live messages
+    go first; in between, spooled images are sent oldest first at up to DRAIN_RATE per second.
+    """
+    min_interval = 1.0 / DRAIN_RATE if DRAIN_RATE else 0
+    next_drain = 0.0
+    while True:
+        draining = _connected.is_set() and spool.depth() > 0
+        timeout = max(0.0, next_drain - time.monotonic()) if draining else 30
+        try:
+            kind, payload = _outbox.get(timeout=timeout)
+        except queue.Empty:
+            kind = payload = None
+        else:
+            try:
+                if kind == _IMAGE:
+                    _send_image(payload)
+                elif kind == _STATUS:
+                    # QoS 1 round trip on this small message doubles as the acknowledgement latency probe
+                    _publish(STATUS_TOPIC, payload)
+            except Exception as e:
+                print(f"[MQTT] Sender error: {e}")
+            finally:
+                _outbox.task_done()
+            if kind is not None:
+                continue
+
+        if _connected.is_set() and time.monotonic() >= next_drain:
+            try:
+                sent = _drain_one()
+            except Exception as e:
+                print(f"[MQTT] Spool drain error: {e}")
+                sent = False
+            # Back off a little after a failure so a persistent error doesn't spin
+            next_drain = time.monotonic() + (min_interval if sent else max(min_interval, 1.0))
+
+def flush(timeout=None):
+    """
+    Waits until every message handed to send_image / send_status has been sent or
+    spooled, e.g. before a short-lived script exits. Returns False on timeout.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with _outbox.all_tasks_done:
+        while _outbox.unfinished_tasks:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            _outbox.all_tasks_done.wait(remaining)
+    return True
+
+def spool_stats():
+    """Returns spool depth, recent drain rate (messages/s) and total dropped messages."""
+    return {"depth": spool.depth(), "drain_rate": round(_stats["drain_rate"], 2), "dropped": spool.dropped}
 
 # === Send JPEG image to broker ===
-def send_image(jpeg_bytes):
-    if jpeg_bytes:
-        client.publish(IMAGE_TOPIC, jpeg_bytes)
-        print(f"[MQTT] Image published to topic '{IMAGE_TOPIC}' ({len(jpeg_bytes)} bytes)")
+def send_image(jpeg_bytes, metadata=None):
+    """
+    Queues a JPEG for publishing, wrapped in a metadata envelope if metadata is given.
+    Returns immediately; the sender thread publishes it, or spools it to disk if the
+    broker is unreachable.
+    """
+    if not jpeg_bytes:
+        return
+    payload = pack_message(jpeg_bytes, metadata) if metadata else jpeg_bytes
+    _get_client()
+    try:
+        _outbox.put_nowait((_IMAGE, payload))
+    except queue.Full:
+        # Sender is behind (slow link); keep the image on disk rather than in memory
+        spool.put(payload)
+        print(f"[MQTT] Sender busy, image spooled ({len(payload)} bytes, depth {spool.depth()})")
 
 # === Send status messages as text ===
 def send_status(message):
-    payload = f"{time.strftime('%Y-%m-%d %H:%M:%S')} - {message}"
-    client.publish(STATUS_TOPIC, payload)
+    stats = spool_stats()
+    payload = (f"{time.strftime('%Y-%m-%d %H:%M:%S')} - {message} "
+               f"[spool depth={stats['depth']} drain={stats['drain_rate']}/s dropped={stats['dropped']}]")
+    _get_client()
+    try:
+        _outbox.put_nowait((_STATUS, payload.encode('utf-8')))
+    except queue.Full:
+        print("[MQTT] Sender busy, status message dropped")
+        return
     print(f"[MQTT] Status: {payload}")
-
@@ -0,0 +1,203 @@
+# pi-client/utils/servo_controller.py
+
+import threading
+import time
+
+class ServoController:
+    """
+    Background control loop for the Pan-Tilt HAT.
+
+    Callers only update the target pan/tilt held in memory. A single thread
+    writes to the servos at a fixed rate, coalescing any number of intermediate
+    targets into one I2C write per axis and skipping writes smaller than
+    min_step. Status is served from this cached state, so the UI never reads
+    the bus. Optionally steers toward the motion centroid reported by
+    MotionDetector (auto-track), with smoothing and a dead-zone.
+    """
+
+    def __init__(self, pan_tilt_helper, rate_hz=20, min_step=0.5,
+                 fov=(62.2, 48.8), dead_zone=0.1, gain=0.5, smoothing=0.3,
+                 invert_pan=False, invert_tilt=False, track_interval=0.2, settle_time=0.5):
+        """
+        Parameters:
+            pan_tilt_helper (PanTiltHelper): Initialized helper that performs the I2C writes.
+            rate_hz (float): Maximum servo writes per second per axis.
+            min_step (float): Degrees below which a target change is not written.
+            fov (tuple): Camera horizontal/vertical field of view in degrees (Camera Module v2 default).
+            dead_zone (float): Fraction of the frame around centre in which auto-track does not move.
+            gain (float): Fraction of the centroid offset corrected per tracking step.
+            smoothing (float): Weight of each new tracking target (0-1); lower is smoother.
+            invert_pan (bool): Flip pan direction for the camera mounting.
+            invert_tilt (bool): Flip tilt direction for the camera mounting.
+            track_interval (float): Seconds between motion samples in auto-track mode.
+            settle_time (float): Seconds to ignore motion after a move while the image settles.
+        """
+        self.helper = pan_tilt_helper
+        self.interval = 1.0 / rate_hz
+        self.min_step = min_step
+        self.fov = fov
+        self.dead_zone = dead_zone
+        self.gain = gain
+        self.smoothing = smoothing
+        self.pan_sign = -1 if invert_pan else 1
+        self.tilt_sign = -1 if invert_tilt else 1
+        self.track_interval = track_interval
+        self.settle_time = settle_time
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+
+        # Read the hardware once; everything after this is served from memory
+        self.pan = self.helper.get_current_pan_angle() or 0.0
+        self.tilt = self.helper.get_current_tilt_angle() or 0.0
+        self.target_pan = self.pan
+        self.target_tilt = self.tilt
+        self.servos_enabled = self.helper.is_initialized()
+        self.auto_track = False
+        self.last_move = 0.0
+        self.writes = 0
+        self.requests = 0
+
+        self._detector = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._track_thread = None
+
+    def _clamp(self, pan, tilt):
+        helper = self.helper
+        pan = max(helper.pan_min_angle, min(helper.pan_max_angle, pan))
+        tilt = max(helper.tilt_min_angle, min(helper.tilt_max_angle, tilt))
+        return pan, tilt
+
+    def set_target(self, pan=None, tilt=None):
+        """Sets absolute target angles (None leaves an axis unchanged)."""
+        with self._lock:
+            self.requests += 1
+            self.target_pan, self.target_tilt = self._clamp(
+                self.target_pan if pan is None else pan,
+                self.target_tilt if tilt is None else tilt)
+        self._wakeup.set()
+
+    def move_by(self, pan=0.0, tilt=0.0):
+        """Offsets the target angles relative to the current target."""
+        with self._lock:
+            self.requests += 1
+            self.target_pan, self.target_tilt = self._clamp(self.target_pan + pan, self.target_tilt + tilt)
+        self._wakeup.set()
+
+    def enable(self, state):
+        """Enables or disables both servos."""
+        self.helper.enable_servo(1, state)
+        self.helper.enable_servo(2, state)
+        with self._lock:
+            self.servos_enabled = state
+
+    def status(self):
+        """Returns the cached servo state without touching the I2C bus."""
+        with self._lock:
+            return {
+                "current_pan": self.pan,
+                "current_tilt": self.tilt,
+                "target_pan": self.target_pan,
+                "target_tilt": self.target_tilt,
+                "servo_enabled": self.helper.is_initialized() and self.servos_enabled,
+                "auto_track": self.auto_track,
+                "servo_writes": self.writes,
+                "servo_requests": self.requests,
+            }
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(timeout=1.0)
+            self._wakeup.clear()
+            start = time.monotonic()
+
+            with self._lock:
+                pan_due = abs(self.target_pan - self.pan) >= self.min_step
+                tilt_due = abs(self.target_tilt - self.tilt) >= self.min_step
+                target_pan, target_tilt = self.target_pan, self.target_tilt
+
+            if pan_due:
+                self.helper.set_pan_angle(target_pan)
+            if tilt_due:
+                self.helper.set_tilt_angle(target_tilt)
+
+            if pan_due or tilt_due:
+                with self._lock:
+                    if pan_due:
+                        self.pan = target_pan
+                    if tilt_due:
+                        self.tilt = target_tilt
+                    self.writes += int(pan_due) + int(tilt_due)
+                    self.last_move = time.monotonic()
+                # Targets may have changed while writing; re-check after the rate-limit interval
+                self._wakeup.set()
+
+            remaining = self.interval - (time.monotonic() - start)
+            if remaining > 0:
+                time.sleep(remaining)
+
+    # --- Auto-track ---
+    def set_auto_track(self, enabled, detector=None):
+        """
+        Turns auto-track on or off. While on, a thread samples `detector` and steers toward the motion centroid.
+        """
+        if detector is not None:
+            self._detector = detector
+        if enabled and self._detector is None:
+            print("[Servo] Auto-track needs a motion detector.")
+            return False
+        with self._lock:
+            self.auto_track = enabled
+        if enabled and (self._track_thread is None or not self._track_thread.is_alive()):
+            self._detector.reset()
+            self._track_thread = threading.Thread(target=self._track_loop, daemon=True)
+            self._track_thread.start()
+        print(f"[Servo] Auto-track {'enabled' if enabled else 'disabled'}")
+        return True
+
+    def _track_loop(self):
+        while self.auto_track and not self._stop.is_set():
+            try:
+                result = self._detector.analyze()
+                self.update_from_motion(result)
+            except Exception as e:
+                print(f"[Servo] Auto-track error: {e}")
+            time.sleep(self.track_interval)
+
+    def update_from_motion(self, result):
+        """
+        Steers toward the centre of the motion box in a MotionDetector.analyze() result.
+        """
+        if not result.get("motion") or not result.get("box"):
+            return
+        if time.monotonic() - self.last_move < self.settle_time:
+            return  # Motion caused by our own movement
+
+        width, height = result["frame_size"]
+        x1, y1, x2, y2 = result["box"]
+        offset_x = (x1 + x2) / 2 / width - 0.5
+        offset_y = (y1 + y2) / 2 / height - 0.5
+        if abs(offset_x) < self.dead_zone:
+            offset_x = 0.0
+        if abs(offset_y) < self.dead_zone:
+            offset_y = 0.0
+        if offset_x == 0.0 and offset_y == 0.0:
+            return
+
+        with self._lock:
+            desired_pan = self.target_pan + self.pan_sign * offset_x * self.fov[0] * self.gain
+            desired_tilt = self.target_tilt + self.tilt_sign * offset_y * self.fov[1] * self.gain
+            pan = self.target_pan + self.smoothing * (desired_pan - self.target_pan)
+            tilt = self.target_tilt + self.smoothing * (desired_tilt - self.target_tilt)
+        self.set_target(pan, tilt)
+        # The view is about to shift, so the old background no longer applies
+        if self._detector is not None:
+            self._detector.reset()
+
+    def stop(self):
+        """Stops the control and tracking threads."""
+        self.auto_track = False
+        self._stop.set()
+        self._wakeup.set()
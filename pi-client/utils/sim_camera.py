@@ -0,0 +1,151 @@
+# pi-client/utils/sim_camera.py
+
+import glob
+import os
+import time
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+class _SimRequest:
+    """Minimal stand-in for a Picamera2 CompletedRequest holding one decoded frame."""
+
+    def __init__(self, camera, frame):
+        self._camera = camera
+        self._frame = frame
+
+    def make_array(self, name="main"):
+        return self._camera._render(self._frame, name)
+
+    def release(self):
+        self._frame = None
+
+
+class SimulatedPicamera2:
+    """
+    Replays a video file or an image folder through the Picamera2 calls the pi-client uses.
+
+    Frames are resized to the configured main size; the lores stream is produced
+    as a YUV420 (I420) buffer like the real camera, so MotionDetector runs the
+    exact same code path. Lets the motion pipeline run and be profiled on a
+    workstation without picamera2, libcamera or a camera attached.
+    """
+
+    def __init__(self, source, loop=True, fps=None):
+        """
+        Parameters:
+            source (str): Video file, or folder of images replayed in name order.
+            loop (bool): Restart from the beginning when the source runs out.
+            fps (float): If set, pace captures to this rate like a live camera; otherwise as fast as possible.
+        """
+        self.source = source
+        self.loop = loop
+        self.fps = fps
+        self.main_size = None
+        self.main_format = "RGB888"
+        self.lores_size = None
+        self.hflip = False
+        self.vflip = False
+        self.frames_read = 0
+        self.exhausted = False
+        self._last_capture = 0.0
+        self._video = None
+        self._images = None
+        self._index = 0
+        self._open()
+
+    def _open(self):
+        if os.path.isdir(self.source):
+            self._images = sorted(p for p in glob.glob(os.path.join(self.source, '*'))
+                                  if p.lower().endswith(IMAGE_EXTENSIONS))
+            if not self._images:
+                raise ValueError(f"No images found in {self.source}")
+        else:
+            self._video = cv2.VideoCapture(self.source)
+            if not self._video.isOpened():
+                raise ValueError(f"Could not open video {self.source}")
+        print(f"[SimCamera] Replaying {self.source}")
+
+    # --- Configuration (mirrors Picamera2) ---
+    def create_preview_configuration(self, main=None, lores=None, transform=None, **kwargs):
+        return {"main": main or {}, "lores": lores, "transform": transform}
+
+    def create_still_configuration(self, main=None, **kwargs):
+        return {"main": main or {}, "lores": None, "still": True}
+
+    def configure(self, config):
+        main = config.get("main") or {}
+        self.main_size = tuple(main["size"]) if "size" in main else None
+        self.main_format = main.get("format", "XBGR8888")
+        lores = config.get("lores")
+        self.lores_size = tuple(lores["size"]) if lores else None
+        transform = config.get("transform")
+        if transform is not None:
+            self.hflip = bool(getattr(transform, "hflip", False))
+            self.vflip = bool(getattr(transform, "vflip", False))
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def close(self):
+        if self._video is not None:
+            self._video.release()
+
+    # --- Capture ---
+    def _next_frame(self):
+        if self.fps:
+            wait = 1.0 / self.fps - (time.monotonic() - self._last_capture)
+            if wait > 0:
+                time.sleep(wait)
+            self._last_capture = time.monotonic()
+
+        while True:
+            if self._images is not None:
+                if self._index >= len(self._images):
+                    frame = None
+                else:
+                    frame = cv2.imread(self._images[self._index])
+                    self._index += 1
+            else:
+                ok, frame = self._video.read()
+                frame = frame if ok else None
+
+            if frame is not None:
+                self.frames_read += 1
+                return frame
+            if not self.loop:
+                self.exhausted = True
+                raise EOFError(f"End of simulated source {self.source}")
+            self._index = 0
+            if self._video is not None:
+                self._video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def _render(self, frame, name):
+        if self.hflip or self.vflip:
+            frame = cv2.flip(frame, -1 if self.hflip and self.vflip else (1 if self.hflip else 0))
+        if name == "lores":
+            size = self.lores_size or (frame.shape[1] // 2, frame.shape[0] // 2)
+            small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            return cv2.cvtColor(small, cv2.COLOR_BGR2YUV_I420)
+        if self.main_size and (frame.shape[1], frame.shape[0]) != self.main_size:
+            frame = cv2.resize(frame, self.main_size, interpolation=cv2.INTER_AREA)
+        if self.main_format in ("XBGR8888", "XRGB8888"):
+            frame = np.dstack([frame, np.full(frame.shape[:2], 255, dtype=np.uint8)])
+        return frame
+
+    def capture_array(self, name="main"):
+        return self._render(self._next_frame(), name)
+
+    def capture_request(self):
+        return _SimRequest(self, self._next_frame())
+
+    def switch_mode_and_capture_array(self, config, name="main"):
+        # Stills come straight from the source at its native resolution
+        frame = self._next_frame()
+        if self.hflip or self.vflip:
+            frame = cv2.flip(frame, -1 if self.hflip and self.vflip else (1 if self.hflip else 0))
+        return frame
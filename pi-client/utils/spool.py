@@ -0,0 +1,90 @@
+# pi-client/utils/spool.py
+
+import os
+import threading
+import time
+
+class DiskSpool:
+    """
+    Bounded on-disk FIFO of outgoing messages.
+
+    Each message is written to its own file (via a temp file and rename, so a
+    power cut never leaves a half-written entry). When the spool exceeds its
+    file or byte budget the oldest messages are dropped and counted.
+    """
+
+    def __init__(self, directory, max_files=500, max_bytes=200 * 1024 * 1024):
+        """
+        Parameters:
+            directory (str): Folder holding spooled messages (created if missing).
+            max_files (int): Maximum number of spooled messages.
+            max_bytes (int): Maximum total size of spooled messages.
+        """
+        self.directory = directory
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._counter = 0
+        os.makedirs(directory, exist_ok=True)
+
+        # Remove temp files left behind by an interrupted write
+        for name in os.listdir(directory):
+            if name.endswith('.tmp'):
+                os.remove(os.path.join(directory, name))
+
+    def _entries(self):
+        names = sorted(n for n in os.listdir(self.directory) if n.endswith('.msg'))
+        return [os.path.join(self.directory, n) for n in names]
+
+    def put(self, payload):
+        """
+        Appends a message, dropping the oldest ones if the spool is over budget.
+        """
+        with self._lock:
+            self._counter += 1
+            name = f"{time.time_ns():020d}_{self._counter:06d}.msg"
+            path = os.path.join(self.directory, name)
+            with open(path + '.tmp', 'wb') as f:
+                f.write(payload)
+            os.replace(path + '.tmp', path)
+            self._enforce_limits()
+
+    def _enforce_limits(self):
+        entries = self._entries()
+        sizes = [os.path.getsize(p) for p in entries]
+        total = sum(sizes)
+        while entries and (len(entries) > self.max_files or total > self.max_bytes):
+            oldest = entries.pop(0)
+            total -= sizes.pop(0)
+            try:
+                os.remove(oldest)
+                self.dropped += 1
+                print(f"[Spool] Full, dropped oldest message {os.path.basename(oldest)}")
+            except FileNotFoundError:
+                pass
+
+    def peek(self, count):
+        """Returns up to `count` (path, payload) pairs, oldest first, without removing them."""
+        with self._lock:
+            batch = []
+            for path in self._entries()[:count]:
+                try:
+                    with open(path, 'rb') as f:
+                        batch.append((path, f.read()))
+                except FileNotFoundError:
+                    continue
+            return batch
+
+    def remove(self, path):
+        """Deletes a message once it has been delivered."""
+        with self._lock:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def depth(self):
+        """Number of messages waiting in the spool."""
+        with self._lock:
+            return len(self._entries())
@@ -1,8 +1,12 @@
 # tilt_conroller.py
 
-import pantilthat
 import time
 
+try:
+    import pantilthat
+except ImportError:  # Allows running with a fake device on machines without the HAT library
+    pantilthat = None
+
 class PanTiltHelper:
     """
     A helper class to manage the Pan-Tilt HAT for bird recording.
@@ -15,7 +19,7 @@ class PanTiltHelper:
                  servo2_min=575, servo2_max=2325,
                  pan_min_angle=-90, pan_max_angle=90,  # Custom pan limits
                  tilt_min_angle=-90, tilt_max_angle=90, # Custom tilt limits
-                 address=21, i2c_bus=None):
+                 address=21, i2c_bus=None, device=None):
         """
         Initializes the PanTiltHAT. LEDs are disabled by setting enable_lights=False.
 
@@ -31,12 +35,23 @@ class PanTiltHelper:
             tilt_max_angle (int/float): Custom maximum tilt angle in degrees.
             address (int): I2C address of the PanTiltHAT.
             i2c_bus (int): I2C bus number.
+            device: Optional pre-built pantilthat.PanTilt-compatible object (e.g. FakePanTilt).
         """
         self.pan_min_angle = pan_min_angle
         self.pan_max_angle = pan_max_angle
         self.tilt_min_angle = tilt_min_angle
         self.tilt_max_angle = tilt_max_angle
 
+        if device is not None:
+            self.pt = device
+            print(f"Pan-Tilt using {type(device).__name__} device.")
+            return
+
+        if pantilthat is None:
+            print("Error initializing Pan-Tilt HAT: pantilthat library not installed")
+            self.pt = None
+            return
+
         try:
             # Explicitly set enable_lights to False to ensure LEDs are off
             self.pt = pantilthat.PanTilt(